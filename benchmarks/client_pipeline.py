@@ -0,0 +1,320 @@
+"""
+Headless benchmark of the Streamlit client's agent pipeline.
+
+Drives the real `mcp_service` / `chat_service` code paths without Streamlit or
+a provider API key: a scripted chat model replays recorded tool-call
+sequences (trace JSON lines as exported by the client) against a stub MCP
+server over stdio. Reports per-stage timings and memory growth across many turns.
+
+    python client_pipeline.py --turns 5000 --extra-tools 50 --output client.json
+    python client_pipeline.py --traces my_traces.jsonl --baseline client.json
+"""
+import os
+import sys
+import json
+import time
+import uuid
+import asyncio
+import argparse
+import tracemalloc
+from typing import Dict, List
+
+from langchain_core.language_models.chat_models import BaseChatModel
+from langchain_core.messages import AIMessage
+from langchain_core.outputs import ChatGeneration, ChatResult
+
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+CLIENT_DIR = os.path.join(os.path.dirname(BENCH_DIR), "client")
+DEFAULT_TRACES = os.path.join(BENCH_DIR, "fixtures", "agent_turns.jsonl")
+
+
+class HeadlessSessionState(dict):
+    """Stand-in for `st.session_state` (item and attribute access) outside a Streamlit run."""
+
+    def __getattr__(self, key):
+        try:
+            return self[key]
+        except KeyError:
+            raise AttributeError(key)
+
+    def __setattr__(self, key, value):
+        self[key] = value
+
+
+class ScriptedChatModel(BaseChatModel):
+    """Chat model that replays the scripted AI messages of the current turn, one per agent step."""
+
+    script: List[AIMessage] = []
+
+    @property
+    def _llm_type(self) -> str:
+        return "scripted"
+
+    def bind_tools(self, tools, **kwargs):
+        return self
+
+    def _generate(self, messages, stop=None, run_manager=None, **kwargs) -> ChatResult:
+        message = self.script.pop(0) if self.script else AIMessage(content="Done.")
+        return ChatResult(generations=[ChatGeneration(message=message)])
+
+    async def _agenerate(self, messages, stop=None, run_manager=None, **kwargs) -> ChatResult:
+        return self._generate(messages, stop, run_manager, **kwargs)
+
+
+# ------------------------------------------------------------------ scripts
+def _tool_args(attributes: Dict) -> Dict:
+    args = attributes.get("args")
+    if isinstance(args, str):
+        try:
+            args = json.loads(args)
+        except ValueError:
+            args = None
+    return args if isinstance(args, dict) else {}
+
+
+def script_from_trace(trace: Dict) -> List[Dict]:
+    """
+    Rebuild the agent steps of a traced turn: each LLM span becomes one step,
+    and the tool spans that follow it become that step's tool calls.
+    """
+    spans = sorted((s for s in trace["spans"] if s["kind"] in ("llm", "tool")), key=lambda s: s["start"])
+    steps: List[Dict] = []
+    for span in spans:
+        if span["kind"] == "llm":
+            steps.append({"tool_calls": [], "content": span["attributes"].get("answer") or ""})
+        elif steps:
+            steps[-1]["tool_calls"].append({"name": span["name"], "args": _tool_args(span["attributes"])})
+    if not steps or steps[-1]["tool_calls"]:
+        steps.append({"tool_calls": [], "content": ""})
+    return steps
+
+
+def load_scripts(path: str) -> List[Dict]:
+    scripts = []
+    with open(path, "r", encoding="utf-8") as f:
+        for line in f:
+            if line.strip():
+                trace = json.loads(line)
+                turn = next((s for s in trace["spans"] if s["kind"] == "turn"), None)
+                prompt_chars = (turn or {}).get("attributes", {}).get("prompt_chars", 40)
+                scripts.append({"prompt_chars": prompt_chars, "steps": script_from_trace(trace)})
+    if not scripts:
+        raise ValueError(f"No traces found in {path}")
+    return scripts
+
+
+def script_messages(steps: List[Dict]) -> List[AIMessage]:
+    """Fresh AI messages for one turn (tool call ids must be unique per turn)."""
+    return [
+        AIMessage(
+            content="" if step["tool_calls"] else (step["content"] or "Done."),
+            tool_calls=[
+                {"name": call["name"], "args": call["args"], "id": f"call_{uuid.uuid4().hex[:12]}", "type": "tool_call"}
+                for call in step["tool_calls"]
+            ],
+        )
+        for step in steps
+    ]
+
+
+# ------------------------------------------------------------------ measurement
+def percentile(values: List[float], pct: float) -> float:
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, max(0, round(pct / 100 * len(ordered)) - 1))
+    return ordered[index]
+
+
+def summarize(samples: List[float]) -> Dict:
+    window = max(1, min(100, len(samples) // 10))
+    return {
+        "count": len(samples),
+        "mean_ms": round(sum(samples) / len(samples) * 1000, 4),
+        "p50_ms": round(percentile(samples, 50) * 1000, 4),
+        "p95_ms": round(percentile(samples, 95) * 1000, 4),
+        "p99_ms": round(percentile(samples, 99) * 1000, 4),
+        # Growth with history: compare the first and last windows of turns
+        "first_window_mean_ms": round(sum(samples[:window]) / window * 1000, 4),
+        "last_window_mean_ms": round(sum(samples[-window:]) / window * 1000, 4),
+    }
+
+
+class StageTimer:
+    def __init__(self):
+        self.samples: Dict[str, List[float]] = {}
+
+    def measure(self, stage: str, fn, *args, **kwargs):
+        start = time.perf_counter()
+        result = fn(*args, **kwargs)
+        self.samples.setdefault(stage, []).append(time.perf_counter() - start)
+        return result
+
+
+def run(args) -> Dict:
+    # The client resolves config files relative to its own directory
+    os.chdir(CLIENT_DIR)
+    sys.path.insert(0, CLIENT_DIR)
+
+    import streamlit as st
+    state = HeadlessSessionState()
+    st.session_state = state
+
+    from services import chat_service, mcp_service
+    from services.tracing_service import Trace, TracingCallbackHandler
+    from config import AGENT_MAX_STEPS, AGENT_TURN_TIMEOUT
+    from utils.async_helpers import run_async_cancellable
+
+    model = ScriptedChatModel()
+    mcp_service.create_llm_model = lambda *a, **kw: model
+
+    state.loop = asyncio.new_event_loop()
+    asyncio.set_event_loop(state.loop)
+    chat_service.init_session()
+    state.params = {"model_id": "OpenAI", "temperature": 0.0, "max_tokens": 1024}
+    state.servers = {
+        "StubAPI": {
+            "transport": "stdio",
+            "command": sys.executable,
+            "args": [os.path.join(BENCH_DIR, "stub_mcp_server.py"), "--extra-tools", str(args.extra_tools)],
+        }
+    }
+
+    scripts = load_scripts(args.traces)
+    timer = StageTimer()
+    memory: List[Dict] = []
+
+    timer.measure("connect", mcp_service.connect_to_mcp_servers)
+    print(f"Connected: {len(state.tools)} tools. Running {args.turns} turns...")
+
+    tracemalloc.start()
+    try:
+        for turn in range(args.turns):
+            if args.new_chat_every and turn and turn % args.new_chat_every == 0:
+                chat = chat_service.create_chat()
+                state.messages = chat["messages"]
+
+            script = scripts[turn % len(scripts)]
+            user_text = f"turn {turn} " + "x" * max(0, script["prompt_chars"] - 12)
+            model.script = script_messages(script["steps"])
+
+            timer.measure("session_append", chat_service._append_message_to_session,
+                          {"role": "user", "content": user_text})
+
+            callbacks = []
+            if not args.no_trace:
+                trace = Trace("chat turn")
+                callbacks = [TracingCallbackHandler(trace)]
+            timer.measure("run_async_overhead", run_async_cancellable, asyncio.sleep(0))
+            # Same bounded, cancellable run as the playground page
+            progress = {"messages": []}
+            response = timer.measure("agent", run_async_cancellable, asyncio.wait_for(
+                mcp_service.run_agent(state.agent, user_text, callbacks=callbacks,
+                                      max_steps=AGENT_MAX_STEPS, progress=progress),
+                AGENT_TURN_TIMEOUT or None))
+
+            _, response_dct = timer.measure("record_replies", mcp_service.record_agent_replies,
+                                            response.get("messages", []))
+            timer.measure("session_append", chat_service._append_message_to_session, response_dct)
+
+            # What every Streamlit rerun does before drawing: re-read the chat and
+            # format the tool execution history
+            def history_rerender():
+                rendered = 0
+                for m in chat_service.get_current_chat(state.current_chat_id):
+                    rendered += len(m.get("tool") or "") + len(m.get("content") or "")
+                for record in state.tool_executions:
+                    rendered += len(json.dumps(record["input"])) + len(record["output"][:250])
+                return rendered
+            timer.measure("history_rerender", history_rerender)
+
+            if turn % args.sample_every == 0 or turn == args.turns - 1:
+                current, peak = tracemalloc.get_traced_memory()
+                memory.append({"turn": turn, "current_bytes": current, "peak_bytes": peak,
+                               "messages": len(state.messages), "tool_executions": len(state.tool_executions)})
+    finally:
+        tracemalloc.stop()
+        mcp_service.disconnect_from_mcp_servers()
+
+    first, last = memory[0], memory[-1]
+    turns_between = max(1, last["turn"] - first["turn"])
+    return {
+        "stages": {stage: summarize(samples) for stage, samples in timer.samples.items()},
+        "memory": {
+            "growth_bytes_per_turn": round((last["current_bytes"] - first["current_bytes"]) / turns_between, 1),
+            "final_bytes": last["current_bytes"],
+            "peak_bytes": last["peak_bytes"],
+            "samples": memory,
+        },
+    }
+
+
+# ------------------------------------------------------------------ reporting
+def print_report(report: Dict) -> None:
+    columns = ["count", "mean_ms", "p50_ms", "p95_ms", "p99_ms", "first_window_mean_ms", "last_window_mean_ms"]
+    header = ["stage"] + columns
+    rows = [[stage] + [str(stats[c]) for c in columns] for stage, stats in report["stages"].items()]
+    widths = [max(len(row[i]) for row in [header] + rows) for i in range(len(header))]
+    for row in [header] + rows:
+        print("  ".join(value.ljust(width) for value, width in zip(row, widths)))
+    memory = report["memory"]
+    print(f"\nMemory: {memory['growth_bytes_per_turn']} B/turn growth, "
+          f"{memory['final_bytes'] / 1e6:.2f} MB retained, {memory['peak_bytes'] / 1e6:.2f} MB peak")
+
+
+def compare(report: Dict, baseline: Dict, max_regression: float) -> bool:
+    """Print changes against a baseline report; return False on a regression beyond the threshold."""
+    ok = True
+    checks = [(f"{stage} p95_ms", stats["p95_ms"], baseline.get("stages", {}).get(stage, {}).get("p95_ms"))
+              for stage, stats in report["stages"].items() if stage != "connect"]
+    checks.append(("memory growth_bytes_per_turn", report["memory"]["growth_bytes_per_turn"],
+                   baseline.get("memory", {}).get("growth_bytes_per_turn")))
+    for name, value, base in checks:
+        if not base:
+            continue
+        change = (value - base) / base * 100
+        flag = ""
+        if change > max_regression:
+            flag, ok = "  <-- regression", False
+        print(f"  {name}: {base} -> {value} ({change:+.1f}%){flag}")
+    return ok
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--turns", type=int, default=1000)
+    parser.add_argument("--traces", default=DEFAULT_TRACES, help="trace JSON lines to replay")
+    parser.add_argument("--extra-tools", type=int, default=0, help="synthetic tools added to the stub server")
+    parser.add_argument("--new-chat-every", type=int, default=0, help="start a new chat every N turns (0: never)")
+    parser.add_argument("--no-trace", action="store_true", help="run without the tracing callback")
+    parser.add_argument("--sample-every", type=int, default=100, help="memory sampling interval in turns")
+    parser.add_argument("--output", help="write the JSON report here")
+    parser.add_argument("--baseline", help="compare against a previous JSON report")
+    parser.add_argument("--max-regression", type=float, default=15.0, help="allowed regression in percent")
+    return parser.parse_args()
+
+
+def main():
+    args = parse_args()
+    args.traces = os.path.abspath(args.traces)
+    output = os.path.abspath(args.output) if args.output else None
+    baseline_path = os.path.abspath(args.baseline) if args.baseline else None
+
+    report = run(args)
+    report["config"] = {k: v for k, v in vars(args).items() if k not in ("output", "baseline")}
+    print()
+    print_report(report)
+
+    if output:
+        with open(output, "w") as f:
+            json.dump(report, f, indent=2)
+
+    if baseline_path:
+        with open(baseline_path) as f:
+            baseline = json.load(f)
+        print("\nAgainst baseline:")
+        if not compare(report, baseline, args.max_regression):
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
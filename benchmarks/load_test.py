@@ -0,0 +1,318 @@
+"""
+Offline load test for the Weather and Currency MCP servers.
+
+Starts server1/server2 against the local upstream stand-ins, drives every tool
+with many concurrent MCP client sessions and reports throughput, p50/p95/p99
+latency and server event-loop lag per tool. Nothing leaves the machine.
+
+    python load_test.py --sessions 32 --requests 2000 --workers 2 --output report.json
+    python load_test.py --baseline report.json --max-regression 10
+"""
+import os
+import sys
+import json
+import time
+import asyncio
+import argparse
+import itertools
+import subprocess
+import tempfile
+import urllib.request
+from contextlib import asynccontextmanager
+from typing import Callable, Dict, List
+
+from mcp import ClientSession
+from mcp.client.sse import sse_client
+from mcp.client.streamable_http import streamablehttp_client
+from prometheus_client.parser import text_string_to_metric_families
+
+from stub_upstreams import UpstreamStub, start_stub_server
+
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+SERVERS_DIR = os.path.join(ROOT, "servers")
+
+SERVERS = {
+    "weather": {"directory": "server1", "port": 8100},
+    "currency": {"directory": "server2", "port": 8101},
+}
+
+LOCATIONS = ["Baku", "London", "Paris", "Tokyo", "Berlin", "Madrid", "Rome", "Oslo"]
+
+# tool -> (server, argument factory for the i-th request)
+SCENARIOS: Dict[str, tuple] = {
+    "get_current_weather": ("weather", lambda i, keys: {"location": LOCATIONS[i % keys % len(LOCATIONS)]}),
+    "get_forecast": ("weather", lambda i, keys: {"location": LOCATIONS[i % keys % len(LOCATIONS)], "days": 1}),
+    "get_currency_rates": ("currency", lambda i, keys: {}),
+    "convert_currency": ("currency", lambda i, keys: {
+        "amount": 100 + i % 50, "from_currency": "USD", "to_currency": ["AZN", "EUR", "RUB"][i % 3],
+    }),
+}
+
+
+# ------------------------------------------------------------------ processes
+def start_servers(args, upstream_base: str, cache_dir: str) -> Dict[str, subprocess.Popen]:
+    processes = {}
+    for name, server in SERVERS.items():
+        env = {
+            **os.environ,
+            "PYTHONPATH": SERVERS_DIR,
+            "MCP_PORT": str(server["port"]),
+            "MCP_TRANSPORT": args.transport,
+            "MCP_WORKERS": str(args.workers),
+            "MCP_CACHE_ENABLED": "false" if args.no_cache else "true",
+            "MCP_CACHE_DIR": cache_dir,
+            "PROMETHEUS_MULTIPROC_DIR": os.path.join(cache_dir, f"metrics-{name}"),
+            "WTTR_URL": upstream_base,
+            "CBAR_URL": f"{upstream_base}/currencies",
+        }
+        os.makedirs(env["PROMETHEUS_MULTIPROC_DIR"], exist_ok=True)
+        processes[name] = subprocess.Popen(
+            [sys.executable, "main.py"],
+            cwd=os.path.join(SERVERS_DIR, server["directory"]),
+            env=env,
+            stdout=subprocess.DEVNULL,
+            stderr=None if args.verbose else subprocess.DEVNULL,
+        )
+    for name in SERVERS:
+        wait_until_ready(name, processes[name])
+    return processes
+
+
+def stop_servers(processes: Dict[str, subprocess.Popen]) -> None:
+    for process in processes.values():
+        process.terminate()
+    for process in processes.values():
+        try:
+            process.wait(timeout=10)
+        except subprocess.TimeoutExpired:
+            process.kill()
+
+
+def base_url(server: str) -> str:
+    return f"http://127.0.0.1:{SERVERS[server]['port']}"
+
+
+def wait_until_ready(server: str, process: subprocess.Popen, timeout: float = 30.0) -> None:
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if process.poll() is not None:
+            raise RuntimeError(f"{server} server exited with code {process.returncode}")
+        try:
+            urllib.request.urlopen(f"{base_url(server)}/metrics", timeout=1)
+            return
+        except OSError:
+            time.sleep(0.2)
+    raise RuntimeError(f"{server} server did not become ready within {timeout}s")
+
+
+# ------------------------------------------------------------------ server metrics
+def scrape(server: str) -> Dict:
+    """Return the server-side counters needed to attribute lag and errors to a phase."""
+    with urllib.request.urlopen(f"{base_url(server)}/metrics", timeout=5) as response:
+        text = response.read().decode("utf-8")
+    snapshot = {"lag_buckets": {}, "lag_sum": 0.0, "lag_count": 0.0, "tool_errors": {}}
+    for family in text_string_to_metric_families(text):
+        for sample in family.samples:
+            if sample.name == "mcp_event_loop_lag_seconds_bucket":
+                le = float(sample.labels["le"])
+                snapshot["lag_buckets"][le] = snapshot["lag_buckets"].get(le, 0.0) + sample.value
+            elif sample.name == "mcp_event_loop_lag_seconds_sum":
+                snapshot["lag_sum"] += sample.value
+            elif sample.name == "mcp_event_loop_lag_seconds_count":
+                snapshot["lag_count"] += sample.value
+            elif sample.name == "mcp_tool_calls_total" and sample.labels.get("status") == "error":
+                tool = sample.labels["tool"]
+                snapshot["tool_errors"][tool] = snapshot["tool_errors"].get(tool, 0.0) + sample.value
+    return snapshot
+
+
+def lag_between(before: Dict, after: Dict) -> Dict:
+    """Mean and bucket-resolution p99 of the server event-loop lag between two scrapes."""
+    count = after["lag_count"] - before["lag_count"]
+    if count <= 0:
+        return {"mean_ms": None, "p99_ms": None}
+    p99 = None
+    for le in sorted(after["lag_buckets"]):
+        if after["lag_buckets"][le] - before["lag_buckets"].get(le, 0.0) >= 0.99 * count:
+            p99 = le
+            break
+    return {
+        "mean_ms": round((after["lag_sum"] - before["lag_sum"]) / count * 1000, 2),
+        "p99_ms": None if p99 in (None, float("inf")) else round(p99 * 1000, 2),
+    }
+
+
+# ------------------------------------------------------------------ client driver
+@asynccontextmanager
+async def open_session(server: str, transport: str):
+    if transport == "sse":
+        client = sse_client(f"{base_url(server)}/sse")
+    else:
+        client = streamablehttp_client(f"{base_url(server)}/mcp")
+    async with client as (read, write, *_):
+        async with ClientSession(read, write) as session:
+            await session.initialize()
+            yield session
+
+
+def percentile(values: List[float], pct: float) -> float:
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, max(0, round(pct / 100 * len(ordered)) - 1))
+    return ordered[index]
+
+
+async def probe_loop_lag(samples: List[float], interval: float = 0.01) -> None:
+    """Lag of the driver's own loop; high values mean the driver, not the server, saturated."""
+    loop = asyncio.get_running_loop()
+    while True:
+        start = loop.time()
+        await asyncio.sleep(interval)
+        samples.append(loop.time() - start - interval)
+
+
+async def run_phase(tool: str, server: str, make_args: Callable, args, total: int) -> Dict:
+    latencies: List[float] = []
+    failures = 0
+    counter = itertools.count()
+    ready = asyncio.Barrier(args.sessions + 1)
+
+    async def worker():
+        nonlocal failures
+        async with open_session(server, args.transport) as session:
+            await ready.wait()
+            while (i := next(counter)) < total:
+                start = time.perf_counter()
+                try:
+                    result = await session.call_tool(tool, make_args(i, args.distinct_keys))
+                    failures += bool(result.isError)
+                except Exception:
+                    failures += 1
+                latencies.append(time.perf_counter() - start)
+
+    driver_lag: List[float] = []
+    workers = [asyncio.create_task(worker()) for _ in range(args.sessions)]
+    await ready.wait()  # all sessions connected; measure calls only
+    probe = asyncio.create_task(probe_loop_lag(driver_lag))
+    start = time.perf_counter()
+    await asyncio.gather(*workers)
+    elapsed = time.perf_counter() - start
+    probe.cancel()
+
+    return {
+        "requests": len(latencies),
+        "failed_calls": failures,
+        "throughput_rps": round(len(latencies) / elapsed, 1),
+        "p50_ms": round(percentile(latencies, 50) * 1000, 2),
+        "p95_ms": round(percentile(latencies, 95) * 1000, 2),
+        "p99_ms": round(percentile(latencies, 99) * 1000, 2),
+        "driver_loop_lag_max_ms": round(max(driver_lag, default=0.0) * 1000, 2),
+    }
+
+
+async def run_benchmark(args) -> Dict:
+    results = {}
+    for tool in args.tools:
+        server, make_args = SCENARIOS[tool]
+        if args.warmup:
+            await run_phase(tool, server, make_args, args, args.warmup)
+        before = scrape(server)
+        result = await run_phase(tool, server, make_args, args, args.requests)
+        after = scrape(server)
+        result["tool_errors"] = int(after["tool_errors"].get(tool, 0) - before["tool_errors"].get(tool, 0))
+        lag = lag_between(before, after)
+        result["server_loop_lag_mean_ms"] = lag["mean_ms"]
+        result["server_loop_lag_p99_ms"] = lag["p99_ms"]
+        results[tool] = result
+        print(f"  {tool}: {result['throughput_rps']} req/s, p95 {result['p95_ms']} ms")
+    return results
+
+
+# ------------------------------------------------------------------ reporting
+COLUMNS = ["requests", "failed_calls", "tool_errors", "throughput_rps", "p50_ms", "p95_ms", "p99_ms",
+           "server_loop_lag_mean_ms", "server_loop_lag_p99_ms", "driver_loop_lag_max_ms"]
+
+
+def print_table(results: Dict) -> None:
+    header = ["tool"] + COLUMNS
+    rows = [[tool] + [str(r.get(c)) for c in COLUMNS] for tool, r in results.items()]
+    widths = [max(len(row[i]) for row in [header] + rows) for i in range(len(header))]
+    for row in [header] + rows:
+        print("  ".join(value.ljust(width) for value, width in zip(row, widths)))
+
+
+def compare(results: Dict, baseline: Dict, max_regression: float) -> bool:
+    """Print changes against a baseline report; return False on a regression beyond the threshold."""
+    ok = True
+    for tool, result in results.items():
+        base = baseline.get("results", {}).get(tool)
+        if not base:
+            continue
+        for metric, higher_is_better in (("throughput_rps", True), ("p95_ms", False), ("p99_ms", False)):
+            if not base.get(metric):
+                continue
+            change = (result[metric] - base[metric]) / base[metric] * 100
+            regression = -change if higher_is_better else change
+            flag = ""
+            if regression > max_regression:
+                flag, ok = "  <-- regression", False
+            print(f"  {tool} {metric}: {base[metric]} -> {result[metric]} ({change:+.1f}%){flag}")
+    return ok
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--tools", nargs="+", default=list(SCENARIOS), choices=list(SCENARIOS))
+    parser.add_argument("--sessions", type=int, default=16, help="concurrent MCP client sessions")
+    parser.add_argument("--requests", type=int, default=500, help="measured calls per tool")
+    parser.add_argument("--warmup", type=int, default=20, help="unmeasured calls per tool")
+    parser.add_argument("--distinct-keys", type=int, default=4, help="distinct locations/amounts cycled through")
+    parser.add_argument("--transport", choices=["streamable-http", "sse"], default="streamable-http")
+    parser.add_argument("--workers", type=int, default=1, help="MCP_WORKERS of each server")
+    parser.add_argument("--no-cache", action="store_true", help="disable the servers' shared upstream cache")
+    parser.add_argument("--latency-ms", type=float, default=50.0, help="upstream stand-in latency")
+    parser.add_argument("--jitter-ms", type=float, default=10.0)
+    parser.add_argument("--error-rate", type=float, default=0.0, help="fraction of upstream requests failing with 503")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", help="write the JSON report here")
+    parser.add_argument("--baseline", help="compare against a previous JSON report")
+    parser.add_argument("--max-regression", type=float, default=10.0, help="allowed regression in percent")
+    parser.add_argument("--verbose", action="store_true", help="show server logs")
+    return parser.parse_args()
+
+
+def main():
+    args = parse_args()
+    stub = UpstreamStub(args.latency_ms, args.jitter_ms, args.error_rate, args.seed)
+    upstream = start_stub_server(stub)
+    upstream_base = f"http://127.0.0.1:{upstream.server_address[1]}"
+
+    with tempfile.TemporaryDirectory(prefix="mcp-bench-") as cache_dir:
+        processes = start_servers(args, upstream_base, cache_dir)
+        try:
+            print(f"Running {args.requests} calls per tool over {args.sessions} sessions ({args.transport})...")
+            results = asyncio.run(run_benchmark(args))
+        finally:
+            stop_servers(processes)
+            upstream.shutdown()
+
+    config = {k: v for k, v in vars(args).items() if k not in ("output", "baseline", "verbose")}
+    report = {"config": config, "upstream_requests": stub.requests, "results": results}
+    print()
+    print_table(results)
+    print(f"\nUpstream requests served: {stub.requests}")
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2)
+
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+        print("\nAgainst baseline:")
+        if not compare(results, baseline, args.max_regression):
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,65 @@
+"""
+Stub MCP server over stdio with the same tool names as server1/server2.
+
+Tools return canned outputs instantly, so client benchmarks measure the
+client pipeline only. `--extra-tools N` registers N synthetic tools to see how
+the client copes with large tool lists.
+
+    python stub_mcp_server.py --extra-tools 50
+"""
+import json
+import argparse
+from mcp.server.fastmcp import FastMCP
+
+
+mcp = FastMCP("Stub Tools", log_level="WARNING")
+
+CANNED = {
+    "weather": {"temperature": "21", "description": "Partly cloudy", "humidity": "64", "wind_speed": "17"},
+    "forecast": {"date": "2025-05-21", "temperature": "19", "description": "Sunny", "humidity": "52", "wind_speed": "15"},
+    "rates": {"AZN": 1.0, "USD": 1.7, "EUR": 1.9143, "RUB": 0.021105},
+}
+
+
+@mcp.tool()
+async def get_current_weather(location: str) -> str:
+    """Get the current weather for a location."""
+    return json.dumps({**CANNED["weather"], "location": location})
+
+
+@mcp.tool()
+async def get_forecast(location: str, days: int = 1) -> str:
+    """Get a weather forecast for a location."""
+    return json.dumps({**CANNED["forecast"], "location": location, "days": days})
+
+
+@mcp.tool()
+async def get_currency_rates(date: str = None) -> str:
+    """Get current or historical currency rates for USD, EUR, RUB, AZN."""
+    return json.dumps(CANNED["rates"])
+
+
+@mcp.tool()
+async def convert_currency(amount: float, from_currency: str, to_currency: str, date: str = None) -> str:
+    """Convert an amount from one currency to another."""
+    rates = CANNED["rates"]
+    rate = rates.get(from_currency.upper(), 1.0) / rates.get(to_currency.upper(), 1.0)
+    return json.dumps({"amount": amount, "from": from_currency, "to": to_currency,
+                       "rate": round(rate, 6), "converted_amount": round(amount * rate, 4)})
+
+
+def register_extra_tools(count: int) -> None:
+    for i in range(count):
+        async def synthetic(query: str, limit: int = 10) -> str:
+            return json.dumps({"query": query, "limit": limit, "items": []})
+
+        mcp.add_tool(synthetic, name=f"synthetic_tool_{i}",
+                     description=f"Synthetic tool #{i} used to grow the tool list in benchmarks.")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--extra-tools", type=int, default=0)
+    args = parser.parse_args()
+    register_extra_tools(args.extra_tools)
+    mcp.run(transport="stdio")
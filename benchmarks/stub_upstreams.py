@@ -0,0 +1,125 @@
+"""
+Local stand-ins for wttr.in and cbar.az serving recorded responses.
+
+Weather reports are served for any `/<location>?format=j1` and CBAR rates for
+any `/currencies/<DD.MM.YYYY>.xml`, with configurable latency and error
+injection. Forecast dates are shifted so the first day is always today.
+
+    python stub_upstreams.py --port 9100 --latency-ms 80 --error-rate 0.01
+"""
+import os
+import json
+import time
+import random
+import argparse
+import threading
+from datetime import datetime, timedelta
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlparse
+
+
+FIXTURES = os.path.join(os.path.dirname(os.path.abspath(__file__)), "fixtures")
+
+
+def load_weather_fixture() -> dict:
+    with open(os.path.join(FIXTURES, "wttr_j1.json"), "r", encoding="utf-8") as f:
+        return json.load(f)
+
+
+def load_rates_fixture() -> bytes:
+    with open(os.path.join(FIXTURES, "cbar.xml"), "rb") as f:
+        return f.read()
+
+
+class UpstreamStub:
+    """Recorded upstream responses plus the latency/error profile to serve them with."""
+
+    def __init__(self, latency_ms: float = 0.0, jitter_ms: float = 0.0, error_rate: float = 0.0, seed: int = 0):
+        self.latency_ms = latency_ms
+        self.jitter_ms = jitter_ms
+        self.error_rate = error_rate
+        self.weather = load_weather_fixture()
+        self.rates = load_rates_fixture()
+        self.requests = 0
+        self._random = random.Random(seed)  # seeded so runs are reproducible
+        self._lock = threading.Lock()
+
+    def weather_body(self) -> bytes:
+        data = dict(self.weather)
+        today = datetime.now()
+        data["weather"] = [
+            {**day, "date": (today + timedelta(days=i)).strftime("%Y-%m-%d")}
+            for i, day in enumerate(self.weather["weather"])
+        ]
+        return json.dumps(data).encode("utf-8")
+
+    def draw(self):
+        """Return (delay in seconds, whether to fail) for the next request."""
+        with self._lock:
+            self.requests += 1
+            delay = max(0.0, self.latency_ms + self._random.uniform(-self.jitter_ms, self.jitter_ms)) / 1000
+            fail = self._random.random() < self.error_rate
+        return delay, fail
+
+
+def make_handler(stub: UpstreamStub):
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+
+        def do_GET(self):
+            delay, fail = stub.draw()
+            time.sleep(delay)
+
+            path = urlparse(self.path).path
+            if fail:
+                self._send(503, b"injected upstream failure", "text/plain")
+            elif path.startswith("/currencies/") and path.endswith(".xml"):
+                self._send(200, stub.rates, "application/xml")
+            elif len(path) > 1:
+                self._send(200, stub.weather_body(), "application/json")
+            else:
+                self._send(404, b"not found", "text/plain")
+
+        def _send(self, status: int, body: bytes, content_type: str):
+            self.send_response(status)
+            self.send_header("Content-Type", content_type)
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, format, *args):
+            pass
+
+    return Handler
+
+
+def start_stub_server(stub: UpstreamStub, port: int = 0, host: str = "127.0.0.1") -> ThreadingHTTPServer:
+    """Serve *stub* from a background thread; port 0 picks a free port."""
+    server = ThreadingHTTPServer((host, port), make_handler(stub))
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--port", type=int, default=9100)
+    parser.add_argument("--latency-ms", type=float, default=50.0)
+    parser.add_argument("--jitter-ms", type=float, default=10.0)
+    parser.add_argument("--error-rate", type=float, default=0.0)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    stub = UpstreamStub(args.latency_ms, args.jitter_ms, args.error_rate, args.seed)
+    server = start_stub_server(stub, args.port)
+    base = f"http://127.0.0.1:{server.server_address[1]}"
+    print(f"WTTR_URL={base}")
+    print(f"CBAR_URL={base}/currencies")
+    try:
+        threading.Event().wait()
+    except KeyboardInterrupt:
+        server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
@@ -1,15 +1,15 @@
-import os
-import datetime
+import asyncio
 import streamlit as st
-from langchain_core.messages import HumanMessage, ToolMessage
+from langgraph.errors import GraphRecursionError
 from services.ai_service import get_response_stream
-from services.mcp_service import run_agent
+from services.mcp_service import run_agent, record_agent_replies
 from services.chat_service import get_current_chat, _append_message_to_session
-from utils.async_helpers import run_async
+from services.tracing_service import Trace, TracingCallbackHandler, current_trace, export_trace
+from utils.async_helpers import run_async_cancellable
 from utils.ai_prompts import make_system_prompt, make_main_prompt
 import ui_components.sidebar_components as sd_compents
-from  ui_components.main_components import display_tool_executions
-from config import DEFAULT_MAX_TOKENS, DEFAULT_TEMPERATURE
+from  ui_components.main_components import display_tool_executions, display_trace_waterfall, display_tool_console
+from config import DEFAULT_MAX_TOKENS, DEFAULT_TEMPERATURE, AGENT_TURN_TIMEOUT, AGENT_MAX_STEPS
 import traceback
 
 
@@ -41,9 +41,14 @@ def main():
     sd_compents.create_sidebar_chat_buttons()
     sd_compents.create_provider_select_widget()
     sd_compents.create_advanced_configuration_widget()
+    sd_compents.create_agent_limits_widget()
     sd_compents.create_mcp_connection_widget()
     sd_compents.create_mcp_tools_widget()
 
+# ------------------------------------------------------------------ Tool console
+    # Call tools directly over the MCP session, without an LLM round-trip
+    display_tool_console()
+
 # ------------------------------------------------------------------ Main Logic
     if user_text is None:  # nothing submitted yet
         st.stop()
@@ -73,50 +78,51 @@ def main():
         with st.spinner("Thinking…", show_time=True):
             system_prompt = make_system_prompt()
             main_prompt = make_main_prompt(user_text)
+            # Trace the turn; the trace id is propagated to MCP servers in request metadata
+            trace = Trace("chat turn",
+                          provider=st.session_state['params'].get('model_id'),
+                          agent=bool(st.session_state.agent))
+            trace_token = current_trace.set(trace)
+            turn_span = trace.start_span("turn", "turn", prompt_chars=len(user_text))
             try:
                 # If agent is available, use it
                 if st.session_state.agent:
-                    response = run_async(run_agent(st.session_state.agent, user_text))
-                    tool_output = None
-                    # Extract tool executions if available
-                    if "messages" in response:
-                        for msg in response["messages"]:
-                            # Look for AIMessage with tool calls
-                            if hasattr(msg, 'tool_calls') and msg.tool_calls:
-                                for tool_call in msg.tool_calls:
-                                    # Find corresponding ToolMessage
-                                    tool_output = next(
-                                        (m.content for m in response["messages"] 
-                                            if isinstance(m, ToolMessage) and 
-                                            m.tool_call_id == tool_call['id']),
-                                        None
-                                    )
-                                    if tool_output:
-                                        st.session_state.tool_executions.append({
-                                            "tool_name": tool_call['name'],
-                                            "input": tool_call['args'],
-                                            "output": tool_output,
-                                            "timestamp": datetime.datetime.now().strftime('%Y-%m-%d %H:%M:%S')
-                                        })
-                    # Extract and display the response
-                    output = ""
-                    tool_count = 0
-                    if "messages" in response:
-                        for msg in response["messages"]:
-                            if isinstance(msg, HumanMessage):
-                                continue  # Skip human messages
-                            elif hasattr(msg, 'name') and msg.name:  # ToolMessage
-                                tool_count += 1
-                                with messages_container.chat_message("assistant"):
-                                    tool_message = f"**ToolMessage - {tool_count} ({msg.name}):** \n" + msg.content
-                                    st.code(tool_message, language='yaml')
-                                    _append_message_to_session({'role': 'assistant', 'tool': tool_message, })
+                    params = st.session_state['params']
+                    deadline = params.get('turn_timeout', AGENT_TURN_TIMEOUT) or None
+                    max_steps = params.get('max_steps', AGENT_MAX_STEPS)
+                    progress = {"messages": []}  # agent state so far, kept if the run is cut short
+                    stopped = None
+                    stop_slot, status = messages_container.empty(), messages_container.empty()
+                    stop_slot.button("⏹ Stop", key="stop_agent_turn")
+                    try:
+                        with trace.span("agent", "agent", turn_span["span_id"]) as agent_span:
+                            tracer = TracingCallbackHandler(trace, parent_id=agent_span["span_id"])
+                            # Polled run: Stop or a new message cancels the in-flight LLM/MCP calls
+                            response = run_async_cancellable(
+                                asyncio.wait_for(run_agent(st.session_state.agent, user_text, callbacks=[tracer],
+                                                           max_steps=max_steps, progress=progress), deadline),
+                                on_tick=lambda elapsed: status.caption(
+                                    f"⏳ {elapsed:.0f}s · {len(progress['messages'])} messages so far"),
+                            )
+                    except asyncio.TimeoutError:
+                        response, stopped = progress, f"turn deadline of {deadline:g}s reached"
+                    except GraphRecursionError:
+                        response, stopped = progress, f"limit of {max_steps} agent steps reached"
+                    except BaseException as e:
+                        if not isinstance(e, Exception):  # Stop pressed or a new message sent
+                            _append_message_to_session(record_agent_replies(progress["messages"], "stopped by user")[1])
+                        raise
+                    finally:
+                        stop_slot.empty()
+                        status.empty()
+                    # Extract tool executions and display the response
+                    replies, response_dct = record_agent_replies(response.get("messages", []), stopped)
+                    for reply in replies:
+                        with messages_container.chat_message("assistant"):
+                            if "tool" in reply:  # ToolMessage
+                                st.code(reply["tool"], language='yaml')
                             else:  # AIMessage
-                                if hasattr(msg, "content") and msg.content:
-                                    with messages_container.chat_message("assistant"):
-                                        output = str(msg.content)
-                                        st.markdown(output)
-                    response_dct = {"role": "assistant", "content": output}
+                                st.markdown(reply["content"])
                 # Fall back to regular stream response if agent not available
                 else:
                     st.warning("You are not connect to MCP servers!")
@@ -127,15 +133,28 @@ def main():
                         temperature=st.session_state['params'].get('temperature', DEFAULT_TEMPERATURE),
                         max_tokens=st.session_state['params'].get('max_tokens', DEFAULT_MAX_TOKENS), 
                     )         
+                    llm_span = trace.start_span("llm stream", "llm", turn_span["span_id"],
+                                                model=st.session_state['params']['model_id'])
                     with messages_container.chat_message("assistant"):
-                        response = st.write_stream(response_stream)
+                        response = st.write_stream(trace.traced_stream(response_stream, llm_span))
                         response_dct = {"role": "assistant", "content": response}
             except Exception as e:
+                trace.end_span(turn_span, status="error", error=str(e))
                 response = f"⚠️ Something went wrong: {str(e)}"
                 st.error(response)
                 st.code(traceback.format_exc(), language="python")
                 st.stop()
+            finally:
+                if turn_span["end"] is None:
+                    trace.end_span(turn_span)
+                current_trace.reset(trace_token)
+                st.session_state.traces.append(trace.to_dict())
+                export_trace(trace)
         # Add assistant message to chat history
         _append_message_to_session(response_dct)
             
-    display_tool_executions()
+    executions_col, trace_col = st.columns(2)
+    with executions_col:
+        display_tool_executions()
+    with trace_col:
+        display_trace_waterfall()
@@ -18,8 +18,30 @@ MODEL_OPTIONS = {
 DEFAULT_MAX_TOKENS = 4096
 DEFAULT_TEMPERATURE = 1.0
 
-# Load server configuration
-config_path = os.path.join('.', 'servers_config.json')
+# LLM response cache (opt-in, exact match)
+LLM_CACHE_ENABLED = env('LLM_CACHE_ENABLED', 'false').lower() in ('1', 'true', 'yes')
+LLM_CACHE_DIR = env('LLM_CACHE_DIR', os.path.join('.', '.cache', 'llm_responses'))
+LLM_CACHE_MAX_ENTRIES = int(env('LLM_CACHE_MAX_ENTRIES', '256'))
+LLM_CACHE_MAX_DISK_ENTRIES = int(env('LLM_CACHE_MAX_DISK_ENTRIES', '10000'))
+LLM_CACHE_TTL = float(env('LLM_CACHE_TTL', str(7 * 24 * 3600)))  # seconds; 0 = never expire
+
+# Agent turn traces are appended here as JSON lines (disabled when empty)
+TRACE_EXPORT_PATH = env('TRACE_EXPORT_PATH', '')
+
+# Agent run limits: wall-clock deadline per turn (s), LLM steps per turn, per MCP tool call (s); 0 disables
+# Upper bounds of the sidebar inputs; the defaults below are clamped to [0, bound]
+AGENT_TURN_TIMEOUT_MAX = 3600
+AGENT_MAX_STEPS_MAX = 50
+TOOL_CALL_TIMEOUT_MAX = 900
+AGENT_TURN_TIMEOUT = min(max(float(env('AGENT_TURN_TIMEOUT', '120')), 0), AGENT_TURN_TIMEOUT_MAX)
+AGENT_MAX_STEPS = min(max(int(env('AGENT_MAX_STEPS', '10')), 0), AGENT_MAX_STEPS_MAX)
+TOOL_CALL_TIMEOUT = min(max(float(env('TOOL_CALL_TIMEOUT', '30')), 0), TOOL_CALL_TIMEOUT_MAX)
+
+# Max concurrent calls when the tool console fans one call out over many rows
+TOOL_CONSOLE_CONCURRENCY = int(env('TOOL_CONSOLE_CONCURRENCY', '8'))
+
+# Load server configuration (servers_config.gateway.json routes everything through the gateway)
+config_path = os.path.join('.', env('MCP_SERVERS_CONFIG', 'servers_config.json'))
 if os.path.exists(config_path):
     with open(config_path, 'r') as f:
         SERVER_CONFIG = json.load(f)
\ No newline at end of file
@@ -9,7 +9,9 @@ from langchain_anthropic import ChatAnthropic
 from langchain_google_genai import ChatGoogleGenerativeAI
 
 from typing import Optional
-from config import MODEL_OPTIONS
+from config import (MODEL_OPTIONS, LLM_CACHE_ENABLED, LLM_CACHE_DIR, LLM_CACHE_MAX_ENTRIES,
+                    LLM_CACHE_MAX_DISK_ENTRIES, LLM_CACHE_TTL)
+from utils.response_cache import ResponseCache, make_cache_key, chunk_text
 
 
 def create_llm_model(llm_provider: str, **kwargs):
@@ -21,12 +23,14 @@ def create_llm_model(llm_provider: str, **kwargs):
             openai_api_key=params.get("api_key"),
             model=MODEL_OPTIONS['OpenAI'],
             temperature=kwargs.get('temperature', 0.7),
+            streaming=kwargs.get('streaming', False),
         )
     elif llm_provider == "Antropic":
         return ChatAnthropic(
             anthropic_api_key=params.get("api_key"),
             model=MODEL_OPTIONS['Antropic'],
             temperature=kwargs.get('temperature', 0.7),
+            streaming=kwargs.get('streaming', False),
         )
     elif llm_provider == "Bedrock":
         import boto3
@@ -60,11 +64,52 @@ def create_llm_model(llm_provider: str, **kwargs):
         )
     else:
         raise ValueError(f"Unsupported LLM provider: {llm_provider}")
-    
+
+
+@st.cache_resource
+def get_response_cache() -> ResponseCache:
+    """Process-wide LLM response cache, shared by every session."""
+    return ResponseCache(LLM_CACHE_DIR, max_entries=LLM_CACHE_MAX_ENTRIES,
+                         max_disk_entries=LLM_CACHE_MAX_DISK_ENTRIES, ttl=LLM_CACHE_TTL)
+
+
+def get_response_cache_key(
+    llm_provider: str,
+    prompt: str,
+    system: Optional[str] = '',
+    temperature: Optional[float] = None,
+    max_tokens: Optional[int] = None,
+) -> Optional[str]:
+    """
+    Return the cache key for a request, or None when caching does not apply.
+    Caching is opt-in and only used for deterministic (temperature 0) requests
+    unless the user also opted in for any temperature.
+    """
+    params = st.session_state.get('params') or {}
+    if not params.get('response_cache', LLM_CACHE_ENABLED):
+        return None
+    if temperature != 0 and not params.get('cache_any_temperature', False):
+        return None
+    return make_cache_key(
+        provider=llm_provider,
+        model=MODEL_OPTIONS.get(llm_provider),
+        system=system or '',
+        prompt=prompt,
+        temperature=temperature,
+        max_tokens=max_tokens,
+    )
+
 
 def get_response(prompt: str, llm_provider: str):
     """Get a response from the LLM using the standard LangChain interface."""
     try:
+        # Serve identical requests from the response cache when enabled
+        cache_key = get_response_cache_key(llm_provider, prompt)
+        if cache_key:
+            cached = get_response_cache().get(cache_key)
+            if cached is not None:
+                return "".join(cached)
+
         # Create the LLM instance dynamically
         llm = create_llm_model(llm_provider)
 
@@ -73,6 +118,8 @@ def get_response(prompt: str, llm_provider: str):
 
         # Invoke model and return the output content
         response = llm.invoke([message])
+        if cache_key and chunk_text(response):
+            get_response_cache().set(cache_key, [chunk_text(response)])
         return response.content
 
     except Exception as e:
@@ -91,6 +138,13 @@ def get_response_stream(
     All provider-specific connection/auth should be handled via kwargs.
     """
     try:
+        # Replay identical requests from the response cache when enabled
+        cache_key = get_response_cache_key(llm_provider, prompt, system, temperature, max_tokens)
+        if cache_key:
+            cached = get_response_cache().get(cache_key)
+            if cached is not None:
+                return ResponseCache.replay(cached)
+
         # Add streaming and generation params to kwargs
         kwargs.update({
             "temperature": temperature,
@@ -109,6 +163,8 @@ def get_response_stream(
 
         # Stream the response
         stream_response = llm.stream(messages)
+        if cache_key:
+            return get_response_cache().record(cache_key, stream_response)
         return stream_response
     except Exception as e:
         st.error(f"[Error during streaming: {str(e)}]")
@@ -14,6 +14,8 @@ def init_session():
         "agent": None,
         "tools": [],
         "tool_executions": [],
+        "traces": [],
+        "tool_console_results": None,
         "servers": SERVER_CONFIG['mcpServers']
     }
     
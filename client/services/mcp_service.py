@@ -1,29 +1,178 @@
-from typing import Dict, List
+import time
+import asyncio
+from typing import Dict, List, Optional, Tuple
+from datetime import datetime, timedelta
 import streamlit as st
 
+from mcp import ClientSession, types
 from langchain_mcp_adapters.client import MultiServerMCPClient
 from langgraph.prebuilt import create_react_agent
-from langchain_core.tools import BaseTool
+from langchain_core.messages import HumanMessage, ToolMessage
+from langchain_core.tools import BaseTool, StructuredTool, ToolException
+from config import TOOL_CALL_TIMEOUT
 from services.ai_service import create_llm_model
+from services.chat_service import _append_message_to_session
+from services.tracing_service import trace_meta
 from utils.async_helpers import run_async
 
 
+def build_connections(server_config: Dict[str, Dict]) -> Dict[str, Dict]:
+    """
+    Translate servers_config.json entries into adapter connection settings.
+    SSE takes timeouts in seconds, streamable HTTP expects timedeltas.
+    """
+    connections = {}
+    for name, config in server_config.items():
+        connection = dict(config)
+        if connection.get("transport") == "streamable_http":
+            for key in ("timeout", "sse_read_timeout"):
+                if isinstance(connection.get(key), (int, float)):
+                    connection[key] = timedelta(seconds=connection[key])
+        connections[name] = connection
+    return connections
+
 async def setup_mcp_client(server_config: Dict[str, Dict]) -> MultiServerMCPClient:
     """Initialize a MultiServerMCPClient with the provided server configuration."""
-    client = MultiServerMCPClient(server_config)
+    client = MultiServerMCPClient(build_connections(server_config))
     return await client.__aenter__()
 
-async def get_tools_from_client(client: MultiServerMCPClient) -> List[BaseTool]:
+def wrap_mcp_tool(tool: BaseTool, session: ClientSession, server_name: str,
+                  timeout: Optional[float] = None) -> BaseTool:
+    """
+    Re-create an adapter tool so each call carries the current trace id in the
+    MCP request metadata (`_meta`) and reports which server it belongs to.
+    Calls taking longer than *timeout* seconds are abandoned with a tool error.
+    """
+    async def call_tool(**arguments):
+        params = types.CallToolRequestParams(name=tool.name, arguments=arguments, _meta=trace_meta())
+        try:
+            result = await asyncio.wait_for(session.send_request(
+                types.ClientRequest(types.CallToolRequest(method="tools/call", params=params)),
+                types.CallToolResult,
+            ), timeout or None)
+        except asyncio.TimeoutError:
+            if not timeout:
+                raise
+            raise ToolException(f"timeout: {tool.name} did not answer within {timeout:g}s")
+        text = "\n".join(c.text for c in result.content if isinstance(c, types.TextContent))
+        if result.isError:
+            raise ToolException(text)
+        return text
+
+    return StructuredTool(
+        name=tool.name,
+        description=tool.description,
+        args_schema=tool.args_schema,
+        coroutine=call_tool,
+        metadata={"mcp_server": server_name},
+    )
+
+async def get_tools_from_client(client: MultiServerMCPClient, tool_timeout: Optional[float] = None) -> List[BaseTool]:
     """Get tools from the MCP client."""
-    return client.get_tools()
+    tools = []
+    for server_name, server_tools in client.server_name_to_tools.items():
+        session = client.sessions[server_name]
+        tools.extend(wrap_mcp_tool(tool, session, server_name, tool_timeout) for tool in server_tools)
+    return tools
+
+async def run_agent(agent, message: str, callbacks: Optional[List] = None,
+                    max_steps: Optional[int] = None, progress: Optional[Dict] = None) -> Dict:
+    """
+    Run the agent with the provided message.
+
+    *max_steps* bounds the number of LLM steps of the run. The agent state is
+    copied into *progress* after every step, so a caller that times out or
+    cancels the run still has the messages gathered so far.
+    """
+    config = {"callbacks": callbacks or []}
+    if max_steps:
+        config["recursion_limit"] = 2 * max_steps - 1  # agent/tools pairs, then the final agent step
+    state = {"messages": []}
+    async for state in agent.astream({"messages": message}, config=config, stream_mode="values"):
+        if progress is not None:
+            progress.update(state)
+    return state
+
+def extract_tool_executions(messages: List) -> List[Dict]:
+    """Pair each tool call made by the agent with the output of its ToolMessage."""
+    outputs = {m.tool_call_id: m.content for m in messages if isinstance(m, ToolMessage)}
+    timestamp = datetime.now().strftime('%Y-%m-%d %H:%M:%S')
+    executions = []
+    for msg in messages:
+        for tool_call in getattr(msg, 'tool_calls', None) or []:
+            tool_output = outputs.get(tool_call['id'])
+            if tool_output:
+                executions.append({
+                    "tool_name": tool_call['name'],
+                    "input": tool_call['args'],
+                    "output": tool_output,
+                    "timestamp": timestamp,
+                })
+    return executions
+
+def extract_agent_replies(messages: List) -> List[Dict]:
+    """Turn the agent's messages into chat entries (tool outputs and AI replies), in order."""
+    replies = []
+    tool_count = 0
+    for msg in messages:
+        if isinstance(msg, HumanMessage):
+            continue  # Skip human messages
+        elif getattr(msg, 'name', None):  # ToolMessage
+            tool_count += 1
+            replies.append({'role': 'assistant',
+                            'tool': f"**ToolMessage - {tool_count} ({msg.name}):** \n" + msg.content})
+        elif getattr(msg, 'content', None):  # AIMessage
+            replies.append({'role': 'assistant', 'content': str(msg.content)})
+    return replies
+
+def record_agent_replies(agent_messages: List, stopped: Optional[str] = None) -> Tuple[List[Dict], Dict]:
+    """
+    Add the agent's tool executions and tool outputs to the session and build
+    the final assistant message. *stopped* is the reason a run was cut short;
+    the answer is then marked as partial. Returns the replies to display, in
+    order, and the final message (not yet added to the chat).
+    """
+    st.session_state.tool_executions.extend(extract_tool_executions(agent_messages))
+    replies = extract_agent_replies(agent_messages)
+    output = ""
+    for reply in replies:
+        if "tool" in reply:  # ToolMessage
+            _append_message_to_session(reply)
+        else:  # AIMessage
+            output = reply["content"]
+    if stopped:
+        note = f"⚠️ Stopped early ({stopped}); answer based on what was gathered so far."
+        replies.append({'role': 'assistant', 'content': note})
+        output = f"{output}\n\n{note}" if output else note
+    return replies, {"role": "assistant", "content": output}
+
+async def run_tool(tool, arguments: Dict):
+    """Run a tool with the provided arguments."""
+    return await tool.ainvoke(arguments)
+
+async def run_tool_batch(tool, argument_rows: List[Dict], concurrency: int = 8) -> List[Dict]:
+    """
+    Call *tool* directly (no LLM) once per argument row, at most *concurrency*
+    calls at a time over the existing MCP session. Results keep the row order
+    and carry each call's latency; a failing call does not abort the others.
+    """
+    semaphore = asyncio.Semaphore(max(1, concurrency))
 
-async def run_agent(agent, message: str) -> Dict:
-    """Run the agent with the provided message."""
-    return await agent.ainvoke({"messages": message})
+    async def call(arguments: Dict) -> Dict:
+        async with semaphore:
+            start = time.perf_counter()
+            try:
+                output, error = await run_tool(tool, arguments), None
+            except Exception as e:
+                output, error = None, str(e) or type(e).__name__
+            return {
+                "input": arguments,
+                "output": output,
+                "error": error,
+                "latency_ms": round((time.perf_counter() - start) * 1000, 1),
+            }
 
-async def run_tool(tool, **kwargs):
-    """Run a tool with the provided parameters."""
-    return await tool.ainvoke(**kwargs)
+    return await asyncio.gather(*(call(arguments) for arguments in argument_rows))
 
 def connect_to_mcp_servers():
     # Clean up existing client if any
@@ -39,7 +188,9 @@ def connect_to_mcp_servers():
     params = st.session_state['params']
     llm_provider = params.get("model_id")
     try:
-        llm = create_llm_model(llm_provider, temperature=params['temperature'], max_tokens=params['max_tokens'])
+        # Streaming lets the tracer measure time-to-first-token of each agent step
+        llm = create_llm_model(llm_provider, temperature=params['temperature'],
+                               max_tokens=params['max_tokens'], streaming=True)
     except Exception as e:
         st.error(f"Failed to initialize LLM: {e}")
         st.stop()
@@ -47,7 +198,8 @@ def connect_to_mcp_servers():
     
     # Setup new client
     st.session_state.client = run_async(setup_mcp_client(st.session_state.servers))
-    st.session_state.tools = run_async(get_tools_from_client(st.session_state.client))
+    st.session_state.tools = run_async(get_tools_from_client(st.session_state.client,
+                                                             params.get('tool_timeout', TOOL_CALL_TIMEOUT)))
     st.session_state.agent = create_react_agent(llm, st.session_state.tools)
         
 
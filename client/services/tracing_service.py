@@ -0,0 +1,186 @@
+import json
+import time
+import uuid
+import contextvars
+from contextlib import contextmanager
+from typing import Dict, Iterable, Iterator, List, Optional
+from uuid import UUID
+
+from langchain_core.callbacks import BaseCallbackHandler
+
+from config import TRACE_EXPORT_PATH
+
+# Trace of the agent turn being executed; read by the MCP tools to propagate the trace id
+current_trace: contextvars.ContextVar[Optional["Trace"]] = contextvars.ContextVar("current_trace", default=None)
+
+
+class Trace:
+    """
+    Spans of one chat turn: the turn itself, the agent run, each LLM step and
+    each MCP tool call. Spans are plain dicts so they export as JSON as-is.
+    """
+
+    def __init__(self, name: str, **attributes):
+        self.trace_id = uuid.uuid4().hex
+        self.name = name
+        self.attributes = attributes
+        self.start = time.time()
+        self.spans: List[Dict] = []
+
+    def start_span(self, name: str, kind: str, parent_id: Optional[str] = None, **attributes) -> Dict:
+        span = {
+            "span_id": uuid.uuid4().hex[:16],
+            "parent_id": parent_id,
+            "name": name,
+            "kind": kind,
+            "start": time.time(),
+            "end": None,
+            "status": "ok",
+            "attributes": attributes,
+        }
+        self.spans.append(span)
+        return span
+
+    @staticmethod
+    def end_span(span: Dict, status: str = "ok", **attributes) -> None:
+        span["end"] = time.time()
+        span["status"] = status
+        span["attributes"].update(attributes)
+
+    @contextmanager
+    def span(self, name: str, kind: str, parent_id: Optional[str] = None, **attributes):
+        span = self.start_span(name, kind, parent_id, **attributes)
+        try:
+            yield span
+        except BaseException as e:
+            self.end_span(span, status="error", error=str(e) or type(e).__name__)
+            raise
+        if span["end"] is None:
+            self.end_span(span)
+
+    def traced_stream(self, stream: Iterable, span: Dict) -> Iterator:
+        """Pass a response stream through, recording time-to-first-token and chunks/s."""
+        chunks = 0
+        try:
+            for chunk in stream:
+                if chunks == 0:
+                    span["attributes"]["ttft_ms"] = round((time.time() - span["start"]) * 1000, 1)
+                chunks += 1
+                yield chunk
+        except BaseException as e:
+            self.end_span(span, status="error", error=str(e) or type(e).__name__)
+            raise
+        self.end_span(span, output_chunks=chunks)
+        _set_throughput(span, chunks)
+
+    def to_dict(self) -> Dict:
+        return {
+            "trace_id": self.trace_id,
+            "name": self.name,
+            "start": self.start,
+            "attributes": self.attributes,
+            "spans": self.spans,
+        }
+
+
+def _set_throughput(span: Dict, tokens: Optional[int]) -> None:
+    """Set tokens/s over the generation phase (after the first token when known)."""
+    if not tokens or span["end"] is None:
+        return
+    ttft = span["attributes"].get("ttft_ms")
+    generation_start = span["start"] + ttft / 1000 if ttft is not None else span["start"]
+    elapsed = span["end"] - generation_start
+    if elapsed > 0:
+        span["attributes"]["tokens_per_s"] = round(tokens / elapsed, 1)
+
+
+class TracingCallbackHandler(BaseCallbackHandler):
+    """Records LLM steps and tool calls of an agent run as spans of *trace*."""
+
+    run_inline = True  # keep timings exact in async runs
+
+    def __init__(self, trace: Trace, parent_id: Optional[str] = None):
+        self.trace = trace
+        self.parent_id = parent_id
+        self._spans: Dict[UUID, Dict] = {}
+
+    def _parent(self, parent_run_id: Optional[UUID]) -> Optional[str]:
+        parent = self._spans.get(parent_run_id) if parent_run_id else None
+        return parent["span_id"] if parent else self.parent_id
+
+    # ------------------------------------------------------------------ LLM steps
+    def on_chat_model_start(self, serialized, messages, *, run_id, parent_run_id=None, **kwargs):
+        metadata = kwargs.get("metadata") or {}
+        step = sum(1 for s in self._spans.values() if s["kind"] == "llm") + 1
+        self._spans[run_id] = self.trace.start_span(
+            f"llm step {step}", "llm", self._parent(parent_run_id),
+            model=metadata.get("ls_model_name"),
+            provider=metadata.get("ls_provider"),
+            input_messages=sum(len(m) for m in messages),
+        )
+
+    def on_llm_new_token(self, token, *, run_id, **kwargs):
+        span = self._spans.get(run_id)
+        if span is not None and "ttft_ms" not in span["attributes"]:
+            span["attributes"]["ttft_ms"] = round((time.time() - span["start"]) * 1000, 1)
+
+    def on_llm_end(self, response, *, run_id, **kwargs):
+        span = self._spans.get(run_id)
+        if span is None:
+            return
+        usage = {}
+        for generations in response.generations:
+            for generation in generations:
+                message = getattr(generation, "message", None)
+                usage = getattr(message, "usage_metadata", None) or usage
+                if message is not None and message.content and not getattr(message, "tool_calls", None):
+                    span["attributes"]["answer"] = str(message.content)  # final reply, replayed by benchmarks
+        self.trace.end_span(
+            span,
+            input_tokens=usage.get("input_tokens"),
+            output_tokens=usage.get("output_tokens"),
+        )
+        _set_throughput(span, usage.get("output_tokens"))
+
+    def on_llm_error(self, error, *, run_id, **kwargs):
+        span = self._spans.get(run_id)
+        if span is not None:
+            self.trace.end_span(span, status="error", error=str(error))
+
+    # ------------------------------------------------------------------ MCP tool calls
+    def on_tool_start(self, serialized, input_str, *, run_id, parent_run_id=None, inputs=None, **kwargs):
+        metadata = kwargs.get("metadata") or {}
+        name = serialized.get("name", "tool")
+        self._spans[run_id] = self.trace.start_span(
+            name, "tool", self._parent(parent_run_id),
+            server=metadata.get("mcp_server"),
+            args=inputs if inputs is not None else input_str,
+        )
+
+    def on_tool_end(self, output, *, run_id, **kwargs):
+        span = self._spans.get(run_id)
+        if span is not None:
+            self.trace.end_span(span, output_chars=len(str(getattr(output, "content", output))))
+
+    def on_tool_error(self, error, *, run_id, **kwargs):
+        span = self._spans.get(run_id)
+        if span is not None:
+            self.trace.end_span(span, status="error", error=str(error))
+
+
+def trace_meta() -> Optional[Dict]:
+    """MCP request metadata carrying the current trace id, if any."""
+    trace = current_trace.get()
+    return {"trace_id": trace.trace_id} if trace else None
+
+
+def export_trace(trace: Trace) -> None:
+    """Append *trace* to the JSON-lines export file, when configured."""
+    if not TRACE_EXPORT_PATH:
+        return
+    with open(TRACE_EXPORT_PATH, "a", encoding="utf-8") as f:
+        f.write(json.dumps(trace.to_dict(), default=str) + "\n")
+
+
+def traces_to_jsonl(traces: List[Dict]) -> str:
+    return "".join(json.dumps(t, default=str) + "\n" for t in traces)
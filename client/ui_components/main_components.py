@@ -1,5 +1,13 @@
 import streamlit as st
 import json
+import time
+from datetime import datetime
+import pandas as pd
+from config import TOOL_CONSOLE_CONCURRENCY
+from services.mcp_service import run_tool_batch
+from services.tracing_service import traces_to_jsonl
+from utils.async_helpers import run_async
+from utils.tool_schema_parser import extract_tool_fields, parse_argument
 
 # Function to display tool execution details
 def display_tool_executions():
@@ -10,4 +18,161 @@ def display_tool_executions():
                 st.markdown(f"**Input:** ```json{json.dumps(exec_record['input'])}```")
                 st.markdown(f"**Output:** ```{exec_record['output'][:250]}...```")
                 st.markdown(f"**Time:** {exec_record['timestamp']}")
-                st.divider()
\ No newline at end of file
+                st.divider()
+
+# Function to display the latency waterfall of traced turns
+def display_trace_waterfall():
+    if not st.session_state.get("traces"):
+        return
+    traces = st.session_state.traces
+    with st.expander("Latency Trace", expanded=False):
+        index = st.selectbox(
+            "Turn",
+            options=list(range(len(traces)))[::-1],
+            format_func=lambda i: f"#{i+1} · {traces[i]['trace_id'][:8]}",
+            key="trace_selection",
+        )
+        trace = traces[index]
+
+        rows = []
+        for i, span in enumerate(trace["spans"]):
+            attrs = span["attributes"]
+            end = span["end"] or span["start"]
+            rows.append({
+                "span": f"{i+1}. {span['name']}",
+                "kind": span["kind"],
+                "server": attrs.get("server") or "",
+                "start_ms": round((span["start"] - trace["start"]) * 1000, 1),
+                "end_ms": round((end - trace["start"]) * 1000, 1),
+                "duration_ms": round((end - span["start"]) * 1000, 1),
+                "ttft_ms": attrs.get("ttft_ms"),
+                "tokens_per_s": attrs.get("tokens_per_s"),
+                "status": span["status"],
+            })
+        df = pd.DataFrame(rows)
+
+        st.vega_lite_chart(df, {
+            "mark": {"type": "bar", "cornerRadius": 2},
+            "encoding": {
+                "y": {"field": "span", "type": "nominal", "sort": None, "title": None},
+                "x": {"field": "start_ms", "type": "quantitative", "title": "ms"},
+                "x2": {"field": "end_ms"},
+                "color": {"field": "kind", "type": "nominal"},
+                "tooltip": [{"field": c} for c in ("span", "server", "duration_ms", "ttft_ms", "tokens_per_s", "status")],
+            },
+        }, use_container_width=True)
+        st.dataframe(df.drop(columns=["end_ms"]), hide_index=True, use_container_width=True)
+        st.markdown(f"**Trace id:** `{trace['trace_id']}`")
+        st.download_button(
+            "Export traces (JSONL)",
+            data=traces_to_jsonl(traces),
+            file_name="traces.jsonl",
+            mime="application/jsonl",
+        )
+
+
+def _field_input(field, key):
+    """Form widget for one tool argument, chosen from its JSON type."""
+    label = field['name'] + (" *" if field['required'] else "")
+    default, kind = field['default'], field['type']
+    if field['enum']:
+        options = field['enum']
+        index = options.index(default) if default in options else None
+        return st.selectbox(label, options=options, index=index, help=field['description'], key=key)
+    if kind == 'boolean':
+        return st.checkbox(label, value=bool(default), help=field['description'], key=key)
+    if kind in ('integer', 'number'):
+        step = 1 if kind == 'integer' else 0.01
+        value = default if default is None else (int(default) if kind == 'integer' else float(default))
+        return st.number_input(label, value=value, step=step, help=field['description'], key=key)
+    placeholder = '["a", "b"] or a, b' if kind == 'array' else None
+    value = json.dumps(default) if kind in ('array', 'object') and default is not None else (default or "")
+    return st.text_input(label, value=value, placeholder=placeholder, help=field['description'], key=key)
+
+def _parse_row(fields, row):
+    """Tool arguments from a form or table row, leaving out empty optional values."""
+    arguments = {}
+    for field in fields:
+        value = parse_argument(field, row.get(field['name']))
+        if value is None:
+            if field['required']:
+                raise ValueError(f"Missing required argument '{field['name']}'.")
+            continue
+        arguments[field['name']] = value
+    return arguments
+
+def _result_text(result):
+    """Error or output text of a console call; tools returning no text give ''."""
+    return result["error"] if result["error"] else (result["output"] or "")
+
+# Function to call MCP tools directly, without the LLM
+def display_tool_console():
+    if not st.session_state.tools:
+        return
+    tools = {tool.name: tool for tool in st.session_state.tools}
+    with st.expander("🧪 Tool Console", expanded=False):
+        name = st.selectbox("Tool", options=list(tools), key="console_tool")
+        tool = tools[name]
+        fields = extract_tool_fields(tool)
+        st.caption(tool.description.strip().splitlines()[0] if tool.description else "")
+
+        rows, concurrency = None, 1
+        single_tab, fan_out_tab = st.tabs(["Single call", "Fan out"])
+        with single_tab:
+            with st.form(f"console_form_{name}"):
+                values = {f['name']: _field_input(f, key=f"console_{name}_{f['name']}") for f in fields}
+                if st.form_submit_button("Run"):
+                    rows = [values]
+        with fan_out_tab:
+            st.caption("One call per row, run concurrently. Leave a cell empty to use the default.")
+            template = {f['name']: "" if f['default'] is None else
+                        (json.dumps(f['default']) if isinstance(f['default'], (list, dict)) else str(f['default']))
+                        for f in fields}
+            table = st.data_editor(
+                pd.DataFrame([template], columns=[f['name'] for f in fields], dtype=str),
+                num_rows="dynamic",
+                column_config={f['name']: st.column_config.TextColumn(help=f['description']) for f in fields},
+                use_container_width=True,
+                key=f"console_rows_{name}",
+            )
+            concurrency = st.slider("Concurrency", 1, 64, TOOL_CONSOLE_CONCURRENCY, key="console_concurrency")
+            if st.button(f"Run {len(table)} calls", key=f"console_fan_out_{name}"):
+                rows = table.to_dict("records")
+
+        if rows:
+            try:
+                arguments = [_parse_row(fields, row) for row in rows]
+            except ValueError as e:
+                st.error(str(e))
+            else:
+                start = time.perf_counter()
+                results = run_async(run_tool_batch(tool, arguments, concurrency))
+                st.session_state.tool_console_results = {
+                    "tool": name,
+                    "results": results,
+                    "wall_ms": round((time.perf_counter() - start) * 1000, 1),
+                }
+                timestamp = datetime.now().strftime('%Y-%m-%d %H:%M:%S')
+                st.session_state.tool_executions.extend(
+                    {"tool_name": name, "input": r["input"], "output": _result_text(r), "timestamp": timestamp}
+                    for r in results
+                )
+
+        last = st.session_state.get("tool_console_results")
+        if last:
+            df = pd.DataFrame([{
+                "input": json.dumps(r["input"]),
+                "latency_ms": r["latency_ms"],
+                "status": "error" if r["error"] else "ok",
+                "output": _result_text(r),
+            } for r in last["results"]])
+            latency = df["latency_ms"]
+            st.markdown(
+                f"**{last['tool']}** · {len(df)} call(s) in {last['wall_ms']} ms · "
+                f"p50 {latency.quantile(0.5):.1f} ms · p95 {latency.quantile(0.95):.1f} ms · "
+                f"{(df['status'] == 'error').sum()} failed"
+            )
+            if len(df) == 1:
+                st.code(df["output"][0], language="json" if df["status"][0] == "ok" else None)
+            else:
+                st.dataframe(df, hide_index=True, use_container_width=True)
@@ -1,5 +1,6 @@
 import streamlit as st
-from config import MODEL_OPTIONS
+from config import (MODEL_OPTIONS, LLM_CACHE_ENABLED, AGENT_TURN_TIMEOUT, AGENT_MAX_STEPS, TOOL_CALL_TIMEOUT,
+                    AGENT_TURN_TIMEOUT_MAX, AGENT_MAX_STEPS_MAX, TOOL_CALL_TIMEOUT_MAX)
 import traceback
 from services.mcp_service import connect_to_mcp_servers
 from services.chat_service import create_chat, delete_chat
@@ -93,6 +94,30 @@ def create_advanced_configuration_widget():
                                     value=4096,
                                     step=512,)
         params['temperature'] = st.slider("Temperature", 0.0, 1.0, step=0.05, value=1.0)
+        params['response_cache'] = st.checkbox("Cache responses",
+                                    value=params.get('response_cache', LLM_CACHE_ENABLED),
+                                    help="Reuse answers to identical requests (temperature 0 only).")
+        params['cache_any_temperature'] = st.checkbox("Cache at any temperature",
+                                    value=params.get('cache_any_temperature', False),
+                                    disabled=not params['response_cache'])
+
+def create_agent_limits_widget():
+    params = st.session_state["params"]
+    with st.sidebar.expander("⏱️ Agent limits", expanded=False):
+        params['turn_timeout'] = st.number_input("Turn deadline (s)",
+                                    min_value=0, max_value=AGENT_TURN_TIMEOUT_MAX,
+                                    value=int(params.get('turn_timeout', AGENT_TURN_TIMEOUT)),
+                                    step=10,
+                                    help="Stop the agent after this long and answer with what it has. 0 = no deadline.")
+        params['max_steps'] = st.number_input("Max agent steps",
+                                    min_value=0, max_value=AGENT_MAX_STEPS_MAX,
+                                    value=int(params.get('max_steps', AGENT_MAX_STEPS)),
+                                    help="Maximum LLM calls per turn. 0 = LangGraph's default recursion limit.")
+        params['tool_timeout'] = st.number_input("Tool timeout (s)",
+                                    min_value=0, max_value=TOOL_CALL_TIMEOUT_MAX,
+                                    value=int(params.get('tool_timeout', TOOL_CALL_TIMEOUT)),
+                                    step=5,
+                                    help="Per MCP tool call; applied when connecting. 0 = no timeout.")
                 
 def create_mcp_connection_widget():
     with st.sidebar:
@@ -102,6 +127,7 @@ def create_mcp_connection_widget():
                 with st.container(border=True):
                     st.markdown(f"**Server:** {name}")
                     st.markdown(f"**URL:** {config['url']}")
+                    st.markdown(f"**Transport:** {config.get('transport', 'sse')}")
                     if st.button(f"Remove {name}", key=f"remove_{name}"):
                         del st.session_state.servers[name]
                         st.rerun()
@@ -1,3 +1,5 @@
+import time
+import asyncio
 import streamlit as st
 
 # Helper function for running async functions
@@ -5,6 +7,29 @@ def run_async(coro):
     """Run an async function within the stored event loop."""
     return st.session_state.loop.run_until_complete(coro)
 
+def run_async_cancellable(coro, on_tick=None, interval: float = 0.25):
+    """
+    Run an async function within the stored event loop, in short slices.
+
+    After each slice *on_tick(elapsed_seconds)* is called; when it writes to the
+    page, Streamlit gets the chance to raise its stop/rerun exception (Stop
+    pressed, new message sent). The task is then cancelled, which cancels the
+    in-flight LLM and MCP requests, and the exception is re-raised.
+    """
+    loop = st.session_state.loop
+    task = loop.create_task(coro)
+    start = time.monotonic()
+    try:
+        while not task.done():
+            loop.run_until_complete(asyncio.wait({task}, timeout=interval))
+            if on_tick is not None and not task.done():
+                on_tick(time.monotonic() - start)
+    except BaseException:
+        task.cancel()
+        loop.run_until_complete(asyncio.gather(task, return_exceptions=True))
+        raise
+    return task.result()
+
 def reset_connection_state():
     """Reset all connection-related session state variables."""
     if st.session_state.client is not None:
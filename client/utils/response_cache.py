@@ -0,0 +1,156 @@
+import os
+import json
+import time
+import hashlib
+import threading
+from collections import OrderedDict
+from typing import Iterable, Iterator, List, Optional, Tuple
+
+
+def make_cache_key(**parts) -> str:
+    """Build a canonical hash for a request (stable across key order and processes)."""
+    canonical = json.dumps(parts, sort_keys=True, separators=(",", ":"), ensure_ascii=False, default=str)
+    return hashlib.sha256(canonical.encode("utf-8")).hexdigest()
+
+
+def chunk_text(chunk) -> str:
+    """Extract the text of a LangChain stream chunk (plain or content-block form)."""
+    content = getattr(chunk, "content", chunk)
+    if isinstance(content, str):
+        return content
+    if isinstance(content, list):
+        return "".join(
+            block if isinstance(block, str) else block.get("text", "")
+            for block in content
+            if isinstance(block, (str, dict))
+        )
+    return ""
+
+
+class ResponseCache:
+    """
+    Exact-match cache for LLM completions.
+
+    Two tiers: an in-memory LRU in front of a directory of JSON files, so
+    entries survive restarts and are shared by every session of the app.
+    Completions are stored as the list of streamed text chunks and replayed
+    through a generator, which keeps `st.write_stream` working unchanged.
+    Disk entries expire *ttl* seconds after they are written, and the
+    directory is pruned to the newest *max_disk_entries* files.
+    """
+
+    PRUNE_EVERY = 100  # disk writes between prunes
+
+    def __init__(self, cache_dir: str, max_entries: int = 256,
+                 max_disk_entries: int = 10000, ttl: Optional[float] = None):
+        self.cache_dir = cache_dir
+        self.max_entries = max_entries
+        self.max_disk_entries = max_disk_entries
+        self.ttl = ttl
+        self._memory: "OrderedDict[str, Tuple[float, List[str]]]" = OrderedDict()  # key -> (written, chunks)
+        self._lock = threading.Lock()
+        self._writes = 0
+
+    # ------------------------------------------------------------------ tiers
+    def _path(self, key: str) -> str:
+        return os.path.join(self.cache_dir, key[:2], f"{key}.json")
+
+    def _remember(self, key: str, chunks: List[str], written: float) -> None:
+        with self._lock:
+            self._memory[key] = (written, chunks)
+            self._memory.move_to_end(key)
+            while len(self._memory) > self.max_entries:
+                self._memory.popitem(last=False)
+
+    def get(self, key: str) -> Optional[List[str]]:
+        """Return the cached chunks for *key*, or None on a miss."""
+        with self._lock:
+            if key in self._memory:
+                written, chunks = self._memory[key]
+                if not self._expired(written):
+                    self._memory.move_to_end(key)
+                    return chunks
+                del self._memory[key]
+
+        path = self._path(key)
+        try:
+            written = os.path.getmtime(path)
+            if self._expired(written):
+                os.remove(path)
+                return None
+            with open(path, "r", encoding="utf-8") as f:
+                chunks = json.load(f)["chunks"]
+        except (OSError, ValueError, KeyError):
+            return None
+
+        self._remember(key, chunks, written)
+        return chunks
+
+    def set(self, key: str, chunks: List[str]) -> None:
+        """Store *chunks* under *key* in both tiers."""
+        self._remember(key, chunks, time.time())
+
+        path = self._path(key)
+        tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        try:
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                json.dump({"chunks": chunks}, f, ensure_ascii=False)
+            os.replace(tmp_path, path)  # atomic: readers never see half a file
+        except OSError:
+            # The disk tier is best effort; the memory tier still holds the entry
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            return
+
+        with self._lock:
+            self._writes += 1
+            prune = self._writes % self.PRUNE_EVERY == 0
+        if prune:
+            self.prune()
+
+    def _expired(self, written: float) -> bool:
+        return bool(self.ttl) and time.time() - written > self.ttl
+
+    def prune(self) -> None:
+        """Delete expired files and keep the newest max_disk_entries on disk."""
+        entries = []
+        for root, _, files in os.walk(self.cache_dir):
+            for name in files:
+                if not name.endswith(".json"):
+                    continue
+                path = os.path.join(root, name)
+                try:
+                    written = os.path.getmtime(path)
+                    if self._expired(written):
+                        os.remove(path)
+                    else:
+                        entries.append((written, path))
+                except OSError:
+                    pass  # removed by another session meanwhile
+        entries.sort(reverse=True)
+        for _, path in entries[self.max_disk_entries:]:
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+
+    # ------------------------------------------------------------------ streaming
+    @staticmethod
+    def replay(chunks: List[str]) -> Iterator[str]:
+        """Replay a cached completion through the streaming interface."""
+        yield from chunks
+
+    def record(self, key: str, stream: Iterable) -> Iterator[str]:
+        """
+        Pass *stream* through as text chunks and cache the completion once it
+        finishes. Interrupted or failed streams are never cached.
+        """
+        chunks = []
+        for chunk in stream:
+            text = chunk_text(chunk)
+            if text:
+                chunks.append(text)
+                yield text
+        if chunks:
+            self.set(key, chunks)
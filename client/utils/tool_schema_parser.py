@@ -1,3 +1,6 @@
+import json
+
+
 def extract_tool_parameters(tool):
     parameters = []
 
@@ -26,4 +29,62 @@ def extract_tool_parameters(tool):
 
         parameters.append(desc)
 
-    return parameters
\ No newline at end of file
+    return parameters
+
+def _resolve_type(info):
+    """JSON type of a property, unwrapping Optional[...] (anyOf with null)."""
+    for option in info.get('anyOf', []):
+        if option.get('type') != 'null':
+            return {**option, **{k: v for k, v in info.items() if k != 'anyOf'}}
+    return info
+
+
+def extract_tool_fields(tool):
+    """Structured description of each tool argument, used to build input forms."""
+    fields = []
+
+    if not hasattr(tool, 'args_schema'):
+        return fields
+
+    schema = tool.args_schema
+    schema_dict = schema if isinstance(schema, dict) else schema.schema()
+    required = schema_dict.get('required', [])
+
+    for name, info in schema_dict.get('properties', {}).items():
+        info = _resolve_type(info)
+        fields.append({
+            'name': name,
+            'type': info.get('type', 'string'),
+            'required': name in required,
+            'default': info.get('default'),
+            'enum': info.get('enum'),
+            'description': info.get('description') or info.get('title', name),
+        })
+
+    return fields
+
+
+def parse_argument(field, value):
+    """
+    Convert a raw form/table value to the field's JSON type.
+    Returns None for empty values so the argument can be left out.
+    """
+    if value is None or (isinstance(value, str) and not value.strip()):
+        return None
+    if isinstance(value, float) and value != value:  # NaN from an empty table cell
+        return None
+    kind = field['type']
+    try:
+        if kind == 'integer':
+            return int(float(value))
+        if kind == 'number':
+            return float(value)
+        if kind == 'boolean':
+            return value if isinstance(value, bool) else str(value).strip().lower() in ('1', 'true', 'yes')
+        if kind == 'array' and isinstance(value, str) and not value.lstrip().startswith('['):
+            return [item.strip() for item in value.split(',') if item.strip()]  # "a, b" shorthand
+        if kind in ('array', 'object'):
+            return json.loads(value) if isinstance(value, str) else value
+    except (TypeError, ValueError) as e:
+        raise ValueError(f"Invalid value for '{field['name']}' ({kind}): {value!r}") from e
+    return str(value)
@@ -0,0 +1,92 @@
+import os
+import json
+import time
+import sqlite3
+import tempfile
+import threading
+from typing import Any, Optional
+from common.metrics import record_cache_lookup
+
+
+CACHE_ENABLED = os.getenv("MCP_CACHE_ENABLED", "true").lower() in ("1", "true", "yes")
+CACHE_DIR = os.getenv("MCP_CACHE_DIR", os.path.join(tempfile.gettempdir(), "mcp-cache"))
+
+
+class SharedCache:
+    """
+    TTL key/value cache stored in a SQLite file on local disk.
+
+    Every worker process on the host opens the same file, so an upstream
+    response fetched by one worker is served to all of them. The cache is
+    best effort: any SQLite error is treated as a miss.
+    """
+
+    def __init__(self, name: str, default_ttl: float = 300.0, max_entries: int = 4096):
+        self.name = name
+        self.path = os.path.join(CACHE_DIR, f"{name}.sqlite3")
+        self.enabled = CACHE_ENABLED
+        self.default_ttl = float(os.getenv("MCP_CACHE_TTL", default_ttl))
+        self.max_entries = max_entries
+        self._conn = None
+        self._pid = None
+        self._lock = threading.Lock()
+        self._writes = 0
+
+    def _connection(self) -> sqlite3.Connection:
+        # Connections must not cross a fork, so reopen in every worker process
+        if self._conn is None or self._pid != os.getpid():
+            os.makedirs(os.path.dirname(self.path), exist_ok=True)
+            conn = sqlite3.connect(self.path, timeout=5.0, check_same_thread=False, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS cache ("
+                "key TEXT PRIMARY KEY, value TEXT NOT NULL, expires REAL NOT NULL)"
+            )
+            self._conn, self._pid = conn, os.getpid()
+        return self._conn
+
+    def get(self, key: str) -> Optional[Any]:
+        """Return the cached value for *key*, or None if missing or expired."""
+        if not self.enabled:
+            return None
+        try:
+            with self._lock:
+                row = self._connection().execute(
+                    "SELECT value, expires FROM cache WHERE key = ?", (key,)
+                ).fetchone()
+        except sqlite3.Error:
+            record_cache_lookup(self.name, hit=False)
+            return None
+        if row is None or row[1] < time.time():
+            record_cache_lookup(self.name, hit=False)
+            return None
+        record_cache_lookup(self.name, hit=True)
+        return json.loads(row[0])
+
+    def set(self, key: str, value: Any, ttl: Optional[float] = None) -> None:
+        """Store a JSON-serializable *value* under *key* for *ttl* seconds."""
+        if not self.enabled:
+            return
+        expires = time.time() + (self.default_ttl if ttl is None else ttl)
+        try:
+            with self._lock:
+                conn = self._connection()
+                conn.execute(
+                    "INSERT OR REPLACE INTO cache (key, value, expires) VALUES (?, ?, ?)",
+                    (key, json.dumps(value, separators=(",", ":")), expires),
+                )
+                self._writes += 1
+                if self._writes % 100 == 0:
+                    self._prune(conn)
+        except sqlite3.Error:
+            pass
+
+    def _prune(self, conn: sqlite3.Connection) -> None:
+        """Drop expired rows and keep the table under max_entries."""
+        conn.execute("DELETE FROM cache WHERE expires < ?", (time.time(),))
+        conn.execute(
+            "DELETE FROM cache WHERE key NOT IN "
+            "(SELECT key FROM cache ORDER BY expires DESC LIMIT ?)",
+            (self.max_entries,),
+        )
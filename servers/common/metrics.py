@@ -0,0 +1,163 @@
+import os
+import time
+import asyncio
+import logging
+import functools
+from contextlib import contextmanager
+from urllib.parse import urlparse
+
+from prometheus_client import (
+    CONTENT_TYPE_LATEST,
+    REGISTRY,
+    CollectorRegistry,
+    Counter,
+    Gauge,
+    Histogram,
+    generate_latest,
+    multiprocess,
+)
+from mcp.server.lowlevel.server import request_ctx
+from starlette.requests import Request
+from starlette.responses import Response
+
+logger = logging.getLogger("mcp.tools")
+
+
+TOOL_CALLS = Counter(
+    "mcp_tool_calls_total", "Tool calls by outcome.", ["tool", "status"]
+)
+TOOL_LATENCY = Histogram(
+    "mcp_tool_duration_seconds", "Tool handler latency.", ["tool"]
+)
+TOOLS_IN_FLIGHT = Gauge(
+    "mcp_tool_calls_in_flight", "Tool calls currently running.", ["tool"], multiprocess_mode="livesum"
+)
+UPSTREAM_LATENCY = Histogram(
+    "mcp_upstream_duration_seconds", "Upstream fetch latency.", ["host", "status"]
+)
+CACHE_REQUESTS = Counter(
+    "mcp_cache_requests_total", "Shared cache lookups by result.", ["cache", "result"]
+)
+HTTP_IN_FLIGHT = Gauge(
+    "mcp_http_requests_in_flight", "HTTP requests currently being served.", multiprocess_mode="livesum"
+)
+STREAMS_ACTIVE = Gauge(
+    "mcp_sse_sessions_active", "Open SSE streams (SSE sessions and streamable-HTTP GET streams).",
+    multiprocess_mode="livesum",
+)
+EVENT_LOOP_LAG = Histogram(
+    "mcp_event_loop_lag_seconds", "Delay of a periodic event-loop tick beyond its schedule.",
+    buckets=(0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0),
+)
+
+
+def current_trace_id():
+    """Trace id sent by the client in the request's `_meta`, if any."""
+    try:
+        meta = request_ctx.get().meta
+    except LookupError:
+        return None
+    return getattr(meta, "trace_id", None) if meta else None
+
+
+@contextmanager
+def track_tool(tool: str):
+    """
+    Time one call of *tool*. Yields a dict whose "status" the caller may set;
+    the call counts as an error if it raises or leaves the status unset.
+    """
+    outcome = {"status": "error"}
+    TOOLS_IN_FLIGHT.labels(tool).inc()
+    start = time.perf_counter()
+    try:
+        yield outcome
+    finally:
+        elapsed = time.perf_counter() - start
+        TOOL_LATENCY.labels(tool).observe(elapsed)
+        TOOL_CALLS.labels(tool, outcome["status"]).inc()
+        TOOLS_IN_FLIGHT.labels(tool).dec()
+        logger.info("tool=%s status=%s duration_ms=%.1f trace_id=%s",
+                    tool, outcome["status"], elapsed * 1000, current_trace_id())
+
+
+def instrument(fn):
+    """
+    Record call counts, latency, errors and in-flight calls of a tool handler;
+    a call counts as an error when it raises. Apply below `@mcp.tool()` so FastMCP still sees the original signature.
+    """
+    tool = fn.__name__
+
+    @functools.wraps(fn)
+    async def wrapper(*args, **kwargs):
+        with track_tool(tool) as outcome:
+            result = await fn(*args, **kwargs)
+            outcome["status"] = "ok"
+            return result
+
+    return wrapper
+
+
+@contextmanager
+def upstream_timer(url: str):
+    """Time an upstream request to *url*, labelled by host and outcome."""
+    host = urlparse(url).hostname or url
+    status = "error"
+    start = time.perf_counter()
+    try:
+        yield
+        status = "ok"
+    finally:
+        UPSTREAM_LATENCY.labels(host, status).observe(time.perf_counter() - start)
+
+
+def record_cache_lookup(cache: str, hit: bool) -> None:
+    CACHE_REQUESTS.labels(cache, "hit" if hit else "miss").inc()
+
+
+async def monitor_event_loop_lag(interval: float = 0.05) -> None:
+    """Sample how late the event loop wakes up; blocking handlers show up here."""
+    loop = asyncio.get_running_loop()
+    while True:
+        start = loop.time()
+        await asyncio.sleep(interval)
+        EVENT_LOOP_LAG.observe(max(0.0, loop.time() - start - interval))
+
+
+class MetricsMiddleware:
+    """
+    ASGI middleware tracking in-flight HTTP requests and open event streams.
+    Also starts the event-loop lag monitor of the worker on its first request.
+    """
+
+    def __init__(self, app, stream_paths):
+        self.app = app
+        self.stream_paths = set(stream_paths)
+        self._lag_monitor = None
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            return await self.app(scope, receive, send)
+
+        if self._lag_monitor is None:
+            self._lag_monitor = asyncio.create_task(monitor_event_loop_lag())
+
+        is_stream = scope["method"] == "GET" and scope["path"] in self.stream_paths
+        gauge = STREAMS_ACTIVE if is_stream else HTTP_IN_FLIGHT
+        gauge.inc()
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            gauge.dec()
+
+
+def install_metrics(mcp, path: str = "/metrics") -> None:
+    """Expose the metrics of every worker process on *path*."""
+
+    @mcp.custom_route(path, methods=["GET"])
+    async def metrics(request: Request) -> Response:
+        if "PROMETHEUS_MULTIPROC_DIR" in os.environ:
+            registry = CollectorRegistry()
+            multiprocess.MultiProcessCollector(registry)
+        else:
+            registry = REGISTRY
+        return Response(generate_latest(registry), media_type=CONTENT_TYPE_LATEST)
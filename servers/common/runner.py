@@ -0,0 +1,78 @@
+import os
+import shutil
+import tempfile
+import uvicorn
+from common.metrics import MetricsMiddleware, install_metrics
+
+
+def env_flag(name: str, default: bool) -> bool:
+    return os.getenv(name, str(default)).lower() in ("1", "true", "yes")
+
+
+# Transport: "streamable-http" (default, stateless so replicas can sit behind a
+# load balancer) or "sse" (long-lived stream pinned to one process)
+MCP_TRANSPORT = os.getenv("MCP_TRANSPORT", "streamable-http")
+STATELESS_HTTP = env_flag("MCP_STATELESS_HTTP", True)
+JSON_RESPONSE = env_flag("MCP_JSON_RESPONSE", True)
+WORKERS = int(os.getenv("MCP_WORKERS", "1"))
+
+
+def server_settings(port: int) -> dict:
+    """FastMCP settings derived from the environment (MCP_PORT overrides *port*)."""
+    return {
+        "host": "0.0.0.0",
+        "port": int(os.getenv("MCP_PORT", port)),
+        "stateless_http": STATELESS_HTTP,
+        "json_response": JSON_RESPONSE,
+    }
+
+
+def endpoint_path(mcp) -> str:
+    if MCP_TRANSPORT == "sse":
+        return mcp.settings.sse_path
+    return mcp.settings.streamable_http_path
+
+
+def create_app(mcp):
+    """Build the ASGI app for the configured transport, with /metrics."""
+    install_metrics(mcp)
+    if MCP_TRANSPORT == "sse":
+        app = mcp.sse_app()
+    else:
+        app = mcp.streamable_http_app()
+    return MetricsMiddleware(app, stream_paths=[mcp.settings.sse_path, mcp.settings.streamable_http_path])
+
+
+def _prepare_multiprocess_metrics(port: int) -> None:
+    """Give worker processes a fresh shared directory for their metric files."""
+    path = os.environ.setdefault(
+        "PROMETHEUS_MULTIPROC_DIR", os.path.join(tempfile.gettempdir(), f"mcp-metrics-{port}")
+    )
+    shutil.rmtree(path, ignore_errors=True)
+    os.makedirs(path, exist_ok=True)
+
+
+def serve(mcp, app_path: str = "main:app"):
+    """
+    Run the server with MCP_WORKERS uvicorn worker processes sharing one port.
+    *app_path* is the import string of the module-level app built by create_app.
+    """
+    workers = WORKERS
+    if workers > 1 and (MCP_TRANSPORT == "sse" or not STATELESS_HTTP):
+        # Stateful sessions live in one process; the kernel would spread a
+        # client's requests across workers that never saw its session.
+        print("Stateful transport selected: ignoring MCP_WORKERS and running a single worker.")
+        workers = 1
+    if workers > 1:
+        # Must be set before the workers import prometheus_client
+        _prepare_multiprocess_metrics(mcp.settings.port)
+
+    print(f"Connect to this server using http://localhost:{mcp.settings.port}{endpoint_path(mcp)} "
+          f"({MCP_TRANSPORT}, {workers} worker(s))")
+    uvicorn.run(
+        app_path,
+        host=mcp.settings.host,
+        port=mcp.settings.port,
+        workers=workers,
+        log_level=mcp.settings.log_level.lower(),
+    )
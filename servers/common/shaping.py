@@ -0,0 +1,101 @@
+import json
+import math
+from typing import Annotated, Any, Dict, List, Optional
+
+from mcp.server.fastmcp import FastMCP
+from mcp.server.fastmcp.exceptions import ToolError
+from pydantic import BaseModel, Field
+
+from common.metrics import instrument
+
+# Decimal places accepted by the tools' `precision` argument
+Precision = Annotated[int, Field(ge=0, le=6)]
+
+
+def compact(data: Any) -> str:
+    """Serialize *data* as JSON without whitespace."""
+    return json.dumps(data, separators=(",", ":"), ensure_ascii=False)
+
+
+def estimate_tokens(text: str) -> int:
+    """Rough LLM token count (~4 characters per token for English/JSON)."""
+    return math.ceil(len(text) / 4)
+
+
+def tool_error(code: str, message: str) -> ToolError:
+    """
+    Error for a tool to raise: on a `ShapedMCP` server the call is reported
+    with isError set and the text "<code>: <message>".
+    """
+    return ToolError(f"{code}: {message}")
+
+
+class ShapedMCP(FastMCP):
+    """
+    FastMCP server passing `tool_error`s through as they are. FastMCP prefixes
+    every tool failure with "Error executing tool <name>: "; other failures
+    (e.g. argument validation) keep that prefix.
+    """
+
+    async def call_tool(self, name: str, arguments: Dict[str, Any]):
+        try:
+            return await super().call_tool(name, arguments)
+        except ToolError as e:
+            if isinstance(e.__cause__, ToolError):
+                raise e.__cause__ from None
+            raise
+
+
+def _round(value: Any, precision: int) -> Any:
+    if isinstance(value, float):
+        return int(round(value)) if precision <= 0 else round(value, precision)
+    if isinstance(value, dict):
+        return {k: _round(v, precision) for k, v in value.items()}
+    return value
+
+
+def select_fields(record: Dict, fields: Optional[List[str]]) -> Dict:
+    if not fields:
+        return record
+    unknown = [f for f in fields if f not in record]
+    if unknown:
+        raise tool_error("invalid_fields", f"Unknown fields {unknown}; choose from {list(record)}.")
+    return {f: record[f] for f in fields}
+
+
+def shape(model: BaseModel, fields: Optional[List[str]] = None, precision: int = 2) -> str:
+    """Compact JSON of *model*, limited to *fields* and rounded to *precision* decimals."""
+    record = _round(model.model_dump(by_alias=True), precision)
+    return compact(select_fields(record, fields))
+
+
+def register_measurement_tool(mcp) -> None:
+    """Add a tool reporting the serialized size and token estimate of another tool's output."""
+
+    @mcp.tool()
+    @instrument
+    async def measure_tool_output(tool: str, arguments: Optional[Dict[str, Any]] = None) -> str:
+        """Measure how much LLM context a tool call would consume.
+
+        Args:
+            tool: Name of the tool to call
+            arguments: Arguments for the call (e.g. {"location": "Baku", "terse": true})
+
+        Returns:
+            Compact JSON with the output size in characters, bytes and estimated tokens
+        """
+        if tool == "measure_tool_output":
+            raise tool_error("invalid_tool", "Cannot measure the measurement tool itself.")
+        try:
+            content = await mcp.call_tool(tool, arguments or {})
+            text = "".join(c.text for c in content if hasattr(c, "text"))
+            is_error = False
+        except ToolError as e:
+            text, is_error = str(e), True
+        return compact({
+            "tool": tool,
+            "is_error": is_error,
+            "chars": len(text),
+            "bytes": len(text.encode("utf-8")),
+            "tokens_est": estimate_tokens(text),
+        })
@@ -0,0 +1,157 @@
+import os
+import json
+import time
+import asyncio
+from typing import Any, Dict, List, Sequence
+
+from mcp import types
+from mcp.server.fastmcp import FastMCP
+from mcp.server.fastmcp.exceptions import ToolError
+from common.cache import SharedCache
+from common.metrics import current_trace_id, track_tool, upstream_timer
+from common.runner import server_settings, create_app, serve
+from pool import BackendPool
+
+
+BACKENDS_PATH = os.getenv("GATEWAY_BACKENDS", os.path.join(os.path.dirname(__file__), "backends.json"))
+MAX_CONCURRENCY = int(os.getenv("GATEWAY_MAX_CONCURRENCY", "128"))
+# Seconds before reconnecting to a backend that failed to start
+RETRY_INTERVAL = float(os.getenv("GATEWAY_RETRY_INTERVAL", "30"))
+
+# Exported tool names are "<backend>__<tool>"
+NAMESPACE_SEP = "__"
+
+
+class Gateway:
+    """Fronts every backend MCP server behind one namespaced tool list."""
+
+    def __init__(self, backends: Dict[str, Dict]):
+        self.pools = {name: BackendPool(name, config) for name, config in backends.items()}
+        self.cache = SharedCache("gateway", default_ttl=60)
+        self.limit = asyncio.Semaphore(MAX_CONCURRENCY)
+        self._tools: Dict[str, types.Tool] = {}
+        self._loaded = set()
+        self._retry_at: Dict[str, float] = {}
+        self._retries: Dict[str, asyncio.Task] = {}
+        self._locks = {name: asyncio.Lock() for name in self.pools}
+
+    async def ensure_started(self) -> None:
+        """
+        Connect to the backends and collect their tools on first use. Backends
+        that failed are retried in the background every RETRY_INTERVAL seconds,
+        so they never hold up requests to the healthy ones.
+        """
+        first = []
+        for name in self.pools:
+            if name in self._loaded:
+                continue
+            if name not in self._retry_at:
+                first.append(name)
+            elif self._retry_due(name) and (name not in self._retries or self._retries[name].done()):
+                self._retries[name] = asyncio.create_task(self.ensure_backend(name))
+        if first:
+            await asyncio.gather(*(self.ensure_backend(name) for name in first))
+
+    def _retry_due(self, name: str) -> bool:
+        return time.monotonic() >= self._retry_at.get(name, 0)
+
+    async def ensure_backend(self, name: str) -> None:
+        """Connect to one backend unless it is loaded or backing off after a failure."""
+        if name in self._loaded or not self._retry_due(name):
+            return
+        async with self._locks[name]:
+            if name in self._loaded or not self._retry_due(name):
+                return
+            try:
+                await self._load_backend(name)
+            except Exception as e:
+                # Keep serving the healthy backends; retried after RETRY_INTERVAL
+                await self.pools[name].close()
+                self._retry_at[name] = time.monotonic() + RETRY_INTERVAL
+                print(f"Backend '{name}' unavailable, retrying in {RETRY_INTERVAL:g}s: {e}")
+            else:
+                self._loaded.add(name)
+                self._retry_at.pop(name, None)
+
+    async def _load_backend(self, name: str) -> None:
+        pool = self.pools[name]
+        await pool.start()
+        for tool in await pool.list_tools():
+            exported = f"{name}{NAMESPACE_SEP}{tool.name}"
+            self._tools[exported] = tool.model_copy(update={
+                "name": exported,
+                "description": f"[{name}] {tool.description or ''}".strip(),
+            })
+
+    async def list_tools(self) -> List[types.Tool]:
+        await self.ensure_started()
+        return list(self._tools.values())
+
+    async def has_tool(self, name: str) -> bool:
+        """Whether *name* is an exported tool, connecting to its backend if needed."""
+        backend, sep, _ = name.partition(NAMESPACE_SEP)
+        if not sep or backend not in self.pools:
+            return False
+        await self.ensure_backend(backend)
+        return name in self._tools
+
+    async def call_tool(self, name: str, arguments: Dict[str, Any]) -> List[types.TextContent]:
+        if not await self.has_tool(name):
+            raise ToolError(f"Unknown tool: {name}")
+        backend, _, tool = name.partition(NAMESPACE_SEP)
+
+        pool = self.pools[backend]
+        cache_key = json.dumps([name, arguments], sort_keys=True, separators=(",", ":"))
+        cached = self.cache.get(cache_key)
+        if cached is not None:
+            return [types.TextContent(type="text", text=text) for text in cached]
+
+        async with self.limit:
+            trace_id = current_trace_id()
+            meta = {"trace_id": trace_id} if trace_id else None
+            with upstream_timer(pool.config["url"]):
+                result = await pool.call_tool(tool, arguments, meta=meta)
+
+        if result.isError:
+            raise ToolError(" ".join(c.text for c in result.content if isinstance(c, types.TextContent)))
+
+        texts = [c.text for c in result.content if isinstance(c, types.TextContent)]
+        if len(texts) == len(result.content):
+            self.cache.set(cache_key, texts, ttl=pool.config.get("cache_ttl"))
+        return result.content
+
+    async def close(self) -> None:
+        for task in self._retries.values():
+            task.cancel()
+        await asyncio.gather(*(pool.close() for pool in self.pools.values()))
+
+
+class GatewayMCP(FastMCP):
+    """FastMCP server whose tools are proxied to the gateway's backends."""
+
+    def __init__(self, name: str, gateway: Gateway, **settings):
+        self.gateway = gateway
+        super().__init__(name, **settings)
+
+    async def list_tools(self) -> List[types.Tool]:
+        return await self.gateway.list_tools()
+
+    async def call_tool(self, name: str, arguments: Dict[str, Any]) -> Sequence[types.TextContent]:
+        # Only exported names become metric labels, so callers cannot create new series
+        label = name if await self.gateway.has_tool(name) else "unknown"
+        with track_tool(label) as outcome:
+            content = await self.gateway.call_tool(name, arguments)
+            outcome["status"] = "ok"
+            return content
+
+
+with open(BACKENDS_PATH, "r") as f:
+    BACKENDS = json.load(f)["backends"]
+
+mcp = GatewayMCP("MCP Gateway", Gateway(BACKENDS), **server_settings(port=8002))
+
+app = create_app(mcp)
+
+if __name__ == "__main__":
+    print(f"Starting MCP Gateway on port {mcp.settings.port} for {', '.join(BACKENDS)}...")
+    serve(mcp)
@@ -0,0 +1,123 @@
+import asyncio
+import itertools
+from contextlib import AsyncExitStack
+from datetime import timedelta
+from typing import Dict, List, Optional
+
+from mcp import ClientSession, types
+from mcp.client.sse import sse_client
+from mcp.client.streamable_http import streamablehttp_client
+
+
+def open_transport(config: Dict):
+    """Open the client transport described by a backends.json entry."""
+    transport = config.get("transport", "streamable_http")
+    headers = config.get("headers")
+    timeout = config.get("timeout", 30)
+    sse_read_timeout = config.get("sse_read_timeout", 300)
+    if transport == "streamable_http":
+        return streamablehttp_client(
+            config["url"],
+            headers=headers,
+            timeout=timedelta(seconds=timeout),
+            sse_read_timeout=timedelta(seconds=sse_read_timeout),
+        )
+    if transport == "sse":
+        return sse_client(config["url"], headers=headers, timeout=timeout, sse_read_timeout=sse_read_timeout)
+    raise ValueError(f"Unsupported backend transport: {transport}")
+
+
+class BackendSession:
+    """
+    One long-lived MCP client session to a backend server.
+
+    The transport and session are entered and exited by a dedicated task, as
+    anyio requires, so the session outlives the request that opened it.
+    """
+
+    def __init__(self, name: str, config: Dict):
+        self.name = name
+        self.config = config
+        self.session: Optional[ClientSession] = None
+        self._task: Optional[asyncio.Task] = None
+        self._ready = asyncio.Event()
+        self._closing = asyncio.Event()
+        self._error: Optional[BaseException] = None
+
+    @property
+    def alive(self) -> bool:
+        return self.session is not None and self._task is not None and not self._task.done()
+
+    async def start(self) -> None:
+        self._ready.clear()
+        self._closing.clear()
+        self._error = None
+        self._task = asyncio.create_task(self._run(), name=f"mcp-backend-{self.name}")
+        await self._ready.wait()
+        if self._error is not None:
+            raise ConnectionError(f"Could not connect to backend '{self.name}': {self._error}")
+
+    async def _run(self) -> None:
+        try:
+            async with AsyncExitStack() as stack:
+                read, write, *_ = await stack.enter_async_context(open_transport(self.config))
+                session = await stack.enter_async_context(ClientSession(read, write))
+                await session.initialize()
+                self.session = session
+                self._ready.set()
+                await self._closing.wait()
+        except Exception as e:
+            self._error = e
+        finally:
+            self.session = None
+            self._ready.set()
+
+    async def close(self) -> None:
+        self._closing.set()
+        if self._task is not None:
+            await asyncio.gather(self._task, return_exceptions=True)
+
+
+class BackendPool:
+    """
+    A few shared sessions to one backend, used round-robin.
+
+    MCP sessions multiplex concurrent requests by id, so many gateway clients
+    can share a small pool. A semaphore caps in-flight calls per backend.
+    """
+
+    def __init__(self, name: str, config: Dict):
+        self.name = name
+        self.config = config
+        self.sessions = [BackendSession(name, config) for _ in range(int(config.get("pool_size", 2)))]
+        self.limit = asyncio.Semaphore(int(config.get("max_concurrency", 32)))
+        self._next = itertools.cycle(range(len(self.sessions)))
+        self._lock = asyncio.Lock()
+
+    async def start(self) -> None:
+        await asyncio.gather(*(s.start() for s in self.sessions))
+
+    async def _acquire(self) -> ClientSession:
+        backend = self.sessions[next(self._next)]
+        if not backend.alive:
+            async with self._lock:
+                if not backend.alive:  # reconnect dropped sessions lazily
+                    await backend.start()
+        return backend.session
+
+    async def list_tools(self) -> List[types.Tool]:
+        session = await self._acquire()
+        return (await session.list_tools()).tools
+
+    async def call_tool(self, name: str, arguments: Dict, meta: Optional[Dict] = None) -> types.CallToolResult:
+        """Call *name* on the backend, forwarding request metadata such as the trace id."""
+        params = types.CallToolRequestParams(name=name, arguments=arguments, _meta=meta)
+        async with self.limit:
+            session = await self._acquire()
+            return await session.send_request(
+                types.ClientRequest(types.CallToolRequest(method="tools/call", params=params)),
+                types.CallToolResult,
+            )
+
+    async def close(self) -> None:
+        await asyncio.gather(*(s.close() for s in self.sessions))
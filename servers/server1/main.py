@@ -1,86 +1,168 @@
+import os
 import requests
 from datetime import datetime, timedelta
-from mcp.server.fastmcp import FastMCP
-
-
-mcp = FastMCP("Weather Service", host="0.0.0.0", port=8000)
+from typing import Annotated, List, Literal, Optional
+from pydantic import BaseModel, Field
+from common.cache import SharedCache
+from common.metrics import instrument, upstream_timer
+from common.runner import server_settings, create_app, serve
+from common.shaping import Precision, ShapedMCP, register_measurement_tool, shape, tool_error
+
+
+mcp = ShapedMCP("Weather Service", **server_settings(port=8000))
+
+# Upstream weather API (overridable to point at a local stand-in)
+WTTR_URL = os.getenv("WTTR_URL", "https://wttr.in")
+
+# Upstream responses shared by all worker processes (wttr.in updates ~hourly)
+cache = SharedCache("weather", default_ttl=600)
+
+Units = Literal["metric", "imperial"]
+
+# wttr.in keys and display symbols per unit system
+UNIT_KEYS = {
+    "metric": {"temp": "C", "speed": "Kmph", "deg": "°C", "speed_label": "km/h"},
+    "imperial": {"temp": "F", "speed": "Miles", "deg": "°F", "speed_label": "mph"},
+}
+
+class CurrentWeather(BaseModel):
+    location: str
+    temperature: float
+    feels_like: float
+    description: str
+    humidity: int
+    wind_speed: float
+    units: Units
+
+class Forecast(BaseModel):
+    location: str
+    date: str
+    temperature: float
+    min_temperature: float
+    max_temperature: float
+    description: str
+    humidity: int
+    wind_speed: float
+    chance_of_rain: int
+    units: Units
+
+def fetch_weather_data(location: str) -> dict:
+    """Fetch the wttr.in JSON report for a location, served from cache when fresh."""
+    url = f"{WTTR_URL}/{location}?format=j1"  # JSON format
+    data = cache.get(url)
+    if data is None:
+        try:
+            with upstream_timer(url):
+                response = requests.get(url)
+                response.raise_for_status()
+            data = response.json()
+        except (requests.exceptions.RequestException, ValueError) as err:
+            raise tool_error("upstream_unavailable", f"Weather request failed: {err}")
+        cache.set(url, data)
+    return data
 
 @mcp.tool()
-async def get_current_weather(location: str) -> str:
+@instrument
+async def get_current_weather(
+    location: str,
+    units: Units = "metric",
+    precision: Precision = 0,
+    fields: Optional[List[str]] = None,
+    terse: bool = False,
+) -> str:
     """Get the current weather for a location.
     
     Args:
         location: The name of the city or location
+        units: "metric" (°C, km/h) or "imperial" (°F, mph)
+        precision: Decimal places of numeric values, 0-6 (default: 0)
+        fields: Only return these fields, e.g. ["temperature", "description"]
+        terse: Return a one-line summary instead of JSON
 
     Returns:
-        A string describing the current weather conditions
+        Compact JSON with the current conditions, or one line of text when terse
     """
-    url = f"https://wttr.in/{location}?format=j1"  # JSON format
+    data = fetch_weather_data(location)
+    keys = UNIT_KEYS[units]
     try:
-        response = requests.get(url)
-        response.raise_for_status()
-        data = response.json()
-
         current = data['current_condition'][0]
-
-        weather = {
-            "temperature": current['temp_C'],
-            "description": current['weatherDesc'][0]['value'],
-            "humidity": current['humidity'],
-            "wind_speed": current['windspeedKmph']
-        }
-
-        return weather
-
-    except requests.exceptions.RequestException as err:
-        return f"Request failed: {err}"
-    except KeyError:
-        return "Could not parse weather data."
+        weather = CurrentWeather(
+            location=location,
+            temperature=float(current[f"temp_{keys['temp']}"]),
+            feels_like=float(current[f"FeelsLike{keys['temp']}"]),
+            description=current['weatherDesc'][0]['value'],
+            humidity=int(current['humidity']),
+            wind_speed=float(current[f"windspeed{keys['speed']}"]),
+            units=units,
+        )
+    except (KeyError, IndexError, ValueError):
+        raise tool_error("bad_upstream_data", "Could not parse weather data.")
+
+    if terse:
+        return (f"{location}: {weather.temperature:.{precision}f}{keys['deg']}, {weather.description}, "
+                f"humidity {weather.humidity}%, wind {weather.wind_speed:.{precision}f} {keys['speed_label']}")
+    return shape(weather, fields, precision)
 
 @mcp.tool()
-async def get_forecast(location: str, days: int = 3) -> str:
+@instrument
+async def get_forecast(
+    location: str,
+    days: Annotated[int, Field(ge=0, le=2)] = 1,
+    units: Units = "metric",
+    precision: Precision = 0,
+    fields: Optional[List[str]] = None,
+    terse: bool = False,
+) -> str:
     """Get a weather forecast for a location.
     
     Args:
         location: The name of the city or location
-        days: Number of days to forecast (default: 3)
+        days: Days from today, 0-2 (wttr.in forecasts three days; default: 1 = tomorrow)
+        units: "metric" (°C, km/h) or "imperial" (°F, mph)
+        precision: Decimal places of numeric values, 0-6 (default: 0)
+        fields: Only return these fields, e.g. ["date", "temperature"]
+        terse: Return a one-line summary instead of JSON
     
     Returns:
-        A string describing the weather forecast
+        Compact JSON with the forecast for that day, or one line of text when terse
     """
-    url = f"https://wttr.in/{location}?format=j1"
+    data = fetch_weather_data(location)
+    keys = UNIT_KEYS[units]
+
+    # Get the date N days from now
+    target_date = (datetime.now() + timedelta(days=days)).strftime("%Y-%m-%d")
 
     try:
-        response = requests.get(url)
-        response.raise_for_status()
-        data = response.json()
-
-        # Get the date N days from now
-        target_date = (datetime.now() + timedelta(days=days)).strftime("%Y-%m-%d")
-
-        for day in data['weather']:
-            if day['date'] == target_date:
-                avg_temp = day['avgtempC']
-                description = day['hourly'][4]['weatherDesc'][0]['value']  # Around mid-day
-                humidity = day['hourly'][4]['humidity']
-                wind_speed = day['hourly'][4]['windspeedKmph']
-
-                return {
-                    "date": target_date,
-                    "temperature": avg_temp,
-                    "description": description,
-                    "humidity": humidity,
-                    "wind_speed": wind_speed
-                }
-
-        return "No forecast found for that day."
-
-    except requests.exceptions.RequestException as err:
-        return f"Request failed: {err}"
-    except KeyError:
-        return "Could not parse forecast data."
+        day = next((d for d in data['weather'] if d['date'] == target_date), None)
+        if day is None:
+            available = [d['date'] for d in data['weather']]
+            raise tool_error("not_found", f"No forecast for {target_date}; available dates: {available}.")
+        midday = day['hourly'][4]  # Around mid-day
+        forecast = Forecast(
+            location=location,
+            date=target_date,
+            temperature=float(day[f"avgtemp{keys['temp']}"]),
+            min_temperature=float(day[f"mintemp{keys['temp']}"]),
+            max_temperature=float(day[f"maxtemp{keys['temp']}"]),
+            description=midday['weatherDesc'][0]['value'],
+            humidity=int(midday['humidity']),
+            wind_speed=float(midday[f"windspeed{keys['speed']}"]),
+            chance_of_rain=int(midday['chanceofrain']),
+            units=units,
+        )
+    except (KeyError, IndexError, ValueError):
+        raise tool_error("bad_upstream_data", "Could not parse forecast data.")
+
+    if terse:
+        return (f"{location} {target_date}: {forecast.temperature:.{precision}f}{keys['deg']} "
+                f"({forecast.min_temperature:.{precision}f}-{forecast.max_temperature:.{precision}f}), "
+                f"{forecast.description}, rain {forecast.chance_of_rain}%")
+    return shape(forecast, fields, precision)
+
+register_measurement_tool(mcp)
+
+app = create_app(mcp)
 
 if __name__ == "__main__":
-    print("Starting Weather Service MCP server on port 8000...")
-    print("Connect to this server using http://localhost:8000/sse")
-    mcp.run(transport="sse")
\ No newline at end of file
+    print(f"Starting Weather Service MCP server on port {mcp.settings.port}...")
+    serve(mcp)
\ No newline at end of file
@@ -1,32 +1,64 @@
+import os
 import requests
 from datetime import datetime, timedelta
-from mcp.server.fastmcp import FastMCP
+from typing import Dict, List, Optional
+from pydantic import BaseModel, Field
 import xml.etree.ElementTree as ET
+from common.cache import SharedCache
+from common.metrics import instrument, upstream_timer
+from common.runner import server_settings, create_app, serve
+from common.shaping import Precision, ShapedMCP, register_measurement_tool, shape, tool_error
 
-mcp = FastMCP("Currency Exchange", host="0.0.0.0", port=8001)
+mcp = ShapedMCP("Currency Exchange", **server_settings(port=8001))
 
-CBAR_URL = "https://www.cbar.az/currencies"
+# Parsed CBAR rates shared by all worker processes (published once a day)
+cache = SharedCache("currency", default_ttl=3600)
+
+CBAR_URL = os.getenv("CBAR_URL", "https://www.cbar.az/currencies")
 
 CURRENCIES = ["USD", "EUR", "RUB", "AZN"]
 
-def fetch_currency_rates(date: str = None) -> dict:
-    if date:
-        try:
-            # Validate and convert YYYY-MM-DD -> DD.MM.YYYY
-            parsed_date = datetime.strptime(date, "%Y-%m-%d")
-            cbar_date = parsed_date.strftime("%d.%m.%Y")
-            url = f"{CBAR_URL}/{cbar_date}.xml"
-        except ValueError:
-            return {"error": "Invalid date format. Use YYYY-MM-DD."}
-    else:
-        today = datetime.today().strftime("%d.%m.%Y")
-        url = f"{CBAR_URL}/{today}.xml"
+class CurrencyRates(BaseModel):
+    date: str
+    base: str = "AZN"
+    rates: Dict[str, float]
+
+class Conversion(BaseModel):
+    amount: float
+    from_currency: str = Field(serialization_alias="from")
+    to_currency: str = Field(serialization_alias="to")
+    rate: float
+    converted_amount: float
+    date: str
+
+def resolve_date(date: Optional[str]) -> datetime:
+    """Parse a YYYY-MM-DD date, defaulting to today."""
+    if not date:
+        return datetime.today()
+    try:
+        return datetime.strptime(date, "%Y-%m-%d")
+    except ValueError:
+        raise tool_error("invalid_date", "Invalid date format. Use YYYY-MM-DD.")
+
+def fetch_currency_rates(date: Optional[str] = None) -> Dict[str, float]:
+    """AZN value of one unit of each supported currency, served from cache when fresh."""
+    # Convert YYYY-MM-DD -> DD.MM.YYYY
+    cbar_date = resolve_date(date).strftime("%d.%m.%Y")
+    url = f"{CBAR_URL}/{cbar_date}.xml"
+
+    rates = cache.get(url)
+    if rates is not None:
+        return rates
 
     try:
-        response = requests.get(url)
-        response.raise_for_status()
+        with upstream_timer(url):
+            response = requests.get(url)
+            response.raise_for_status()
         root = ET.fromstring(response.content)
+    except (requests.exceptions.RequestException, ET.ParseError) as e:
+        raise tool_error("upstream_unavailable", f"Failed to fetch currency data: {e}")
 
+    try:
         rates = {"AZN": 1.0}  # Base currency
         for val_type in root.findall(".//Valute"):
             code = val_type.get("Code")
@@ -34,28 +66,58 @@ def fetch_currency_rates(date: str = None) -> dict:
                 nominal = int(val_type.find("Nominal").text)
                 value = float(val_type.find("Value").text.replace(",", "."))
                 rates[code] = value / nominal
+    except (AttributeError, ValueError):
+        raise tool_error("bad_upstream_data", "Could not parse currency data.")
 
-        return rates
-
-    except Exception as e:
-        return {"error": f"Failed to fetch currency data: {e}"}
+    cache.set(url, rates)
+    return rates
 
 
 @mcp.tool()
-async def get_currency_rates(date: str = None) -> dict:
+@instrument
+async def get_currency_rates(
+    date: str = None,
+    currencies: Optional[List[str]] = None,
+    precision: Precision = 4,
+    terse: bool = False,
+) -> str:
     """
     Get current or historical currency rates for USD, EUR, RUB, AZN.
 
     Args:
         date: Date in YYYY-MM-DD format. Optional. Defaults to today.
+        currencies: Only return these currency codes, e.g. ["USD", "EUR"].
+        precision: Decimal places of the rates, 0-6 (default: 4).
+        terse: Return a one-line summary instead of JSON.
 
     Returns:
-        Dictionary of currency rates.
+        Compact JSON with the AZN value of one unit of each currency, or one line of text when terse.
     """
-    return fetch_currency_rates(date)
+    rates = fetch_currency_rates(date)
+    if currencies:
+        codes = [c.upper() for c in currencies]
+        unknown = [c for c in codes if c not in rates]
+        if unknown:
+            raise tool_error("unsupported_currency", f"Unsupported currencies {unknown}. Choose from {CURRENCIES}.")
+        rates = {c: rates[c] for c in codes}
+    result = CurrencyRates(date=resolve_date(date).strftime("%Y-%m-%d"), rates=rates)
+
+    if terse:
+        listed = ", ".join(f"{code} {value:.{precision}f}" for code, value in result.rates.items())
+        return f"{result.date} AZN per unit: {listed}"
+    return shape(result, precision=precision)
 
 @mcp.tool()
-async def convert_currency(amount: float, from_currency: str, to_currency: str, date: str = None) -> dict:
+@instrument
+async def convert_currency(
+    amount: float,
+    from_currency: str,
+    to_currency: str,
+    date: str = None,
+    precision: Precision = 4,
+    fields: Optional[List[str]] = None,
+    terse: bool = False,
+) -> str:
     """
     Convert an amount from one currency to another using CBAR official rates.
 
@@ -64,19 +126,20 @@ async def convert_currency(amount: float, from_currency: str, to_currency: str,
         from_currency: Currency code to convert from (USD, EUR, RUB, AZN).
         to_currency: Currency code to convert to (USD, EUR, RUB, AZN).
         date: Optional date in YYYY-MM-DD format. Defaults to today.
+        precision: Decimal places of the rate and converted amount, 0-6 (default: 4).
+        fields: Only return these fields, e.g. ["converted_amount"].
+        terse: Return a one-line summary instead of JSON.
 
     Returns:
-        Dictionary with converted amount and rate info.
+        Compact JSON with the converted amount and rate info, or one line of text when terse.
     """
     rates = fetch_currency_rates(date)
-    if "error" in rates:
-        return rates
 
     from_currency = from_currency.upper()
     to_currency = to_currency.upper()
 
     if from_currency not in rates or to_currency not in rates:
-        return {"error": "Unsupported currency. Choose from USD, EUR, RUB, AZN."}
+        raise tool_error("unsupported_currency", "Unsupported currency. Choose from USD, EUR, RUB, AZN.")
 
     # Apply CBAR conversion logic
     if from_currency == "AZN":
@@ -89,19 +152,26 @@ async def convert_currency(amount: float, from_currency: str, to_currency: str,
         # Foreign currency to foreign currency
         rate = rates[from_currency] / rates[to_currency]
 
-    converted = amount * rate
+    conversion = Conversion(
+        amount=amount,
+        from_currency=from_currency,
+        to_currency=to_currency,
+        rate=rate,
+        converted_amount=amount * rate,
+        date=resolve_date(date).strftime("%Y-%m-%d"),
+    )
+
+    if terse:
+        return (f"{amount:g} {from_currency} = {conversion.converted_amount:.{precision}f} {to_currency} "
+                f"(rate {conversion.rate:.{precision}f}, {conversion.date})")
+    return shape(conversion, fields, precision)
+
+
+register_measurement_tool(mcp)
 
-    return {
-        "amount": amount,
-        "from": from_currency,
-        "to": to_currency,
-        "rate": round(rate, 6),
-        "converted_amount": round(converted, 4),
-        "date": date or datetime.today().strftime("%Y-%m-%d")
-    }
 
+app = create_app(mcp)
 
 if __name__ == "__main__":
-    print("Starting Weather Service MCP server on port 8001...")
-    print("Connect to this server using http://localhost:8001/sse")
-    mcp.run(transport="sse")
\ No newline at end of file
+    print(f"Starting Currency Exchange MCP server on port {mcp.settings.port}...")
+    serve(mcp)
\ No newline at end of file